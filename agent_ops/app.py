@@ -1,10 +1,11 @@
 # app.py
 import streamlit as st
-import pandas as pd
 
-from lib.sheets import get_client, ensure_all_sheets, read_df
-from lib.utils import naira, today_str
-from lib.auth import ensure_logged_in, logout_button, role_badge, goto, can_access
+from lib.sheets import bootstrap
+from lib.ledger import snapshot
+from lib.metrics import instrument
+from lib.utils import naira
+from lib.auth import ensure_logged_in, logout_button, role_badge, sync_badge, goto, can_access
 
 st.set_page_config(page_title="Agent Ops", page_icon="🧾", layout="wide")
 
@@ -49,8 +50,7 @@ if not st.session_state.get("auth"):
 
 # ====== Bootstrap Sheets (friendly error if misconfigured) ======
 try:
-    gc = get_client()
-    ensure_all_sheets(gc)
+    bootstrap()
 except Exception as e:
     st.error("Google Sheets connection failed. Check that:\n"
              "• Sheets API is enabled\n"
@@ -76,23 +76,11 @@ def home_card(title, desc, view_key, kpi=None, allowed_roles=("admin","attendant
 
 def compute_today_kpis():
     # small KPIs for the home cards
-    tx = read_df("transactions")
-    op = read_df("daily_openings")
-    t = today_str()
-    fees = 0.0; gas_sales = 0.0; cash=pos=tr=gas=0.0
-    if not tx.empty:
-        d = tx[tx["date"] == t].copy()
-        for c in ["fee","amount_value","cash_delta","pos_delta","transfer_delta","gas_kg_delta"]:
-            if c in d.columns: d[c] = pd.to_numeric(d[c], errors='coerce').fillna(0.0)
-        fees = d["fee"].sum()
-        gas_sales = d.loc[d["category"]=="gas_sale","amount_value"].sum()
-        if not op.empty and any(op["date"] == t):
-            o = op[op["date"] == t].iloc[0]
-            cash = float(o.get("cash_open",0)); pos = float(o.get("pos_open",0))
-            tr = float(o.get("transfer_open",0)); gas = float(o.get("gas_open_kg",0))
-            cash += d["cash_delta"].sum(); pos += d["pos_delta"].sum()
-            tr += d["transfer_delta"].sum(); gas += d["gas_kg_delta"].sum()
-    return dict(fees=fees, gas_sales=gas_sales, cash=cash, pos=pos, tr=tr, gas=gas)
+    s = snapshot()
+    cash=pos=tr=gas=0.0
+    if s.count and s.has_opening:
+        cash, pos, tr, gas = s.cash, s.pos, s.transfer, s.gas
+    return dict(fees=s.fees, gas_sales=s.gas_revenue, cash=cash, pos=pos, tr=tr, gas=gas)
 
 def render_home():
     role = st.session_state["role"]
@@ -103,6 +91,7 @@ def render_home():
     with cols[0]: st.title("Agent Ops — Home")
     with cols[1]: role_badge(role)
     with cols[2]: logout_button()
+    sync_badge()
 
     k = compute_today_kpis()
 
@@ -120,6 +109,8 @@ def render_home():
                   "gas_inventory", kpi=f"POS exp: {naira(k['pos'])}", allowed_roles=("admin","attendant"))
         home_card("Open Day", "Review or set today’s opening balances. Attendant: view-only.",
                   "open_day", kpi=f"Cash exp: {naira(k['cash'])}", allowed_roles=("admin","attendant"))
+        home_card("Close Day", "Count cash and gas, record the variance and open tomorrow.",
+                  "close_day", allowed_roles=("admin",))
 
     with c3:
         home_card("Admin Dashboard", "KPIs, balances, service mix.", "admin_dashboard",
@@ -127,6 +118,8 @@ def render_home():
         home_card("Prices & Fees", "Tiered fees, bill fees, charging categories, gas price.",
                   "prices_and_fees", allowed_roles=("admin",))
         home_card("Corrections", "Approve corrections / refunds.", "corrections", allowed_roles=("admin",))
+        home_card("Export", "Download transactions for any date range as CSV or Parquet.", "export", allowed_roles=("admin",))
+        home_card("Performance", "API calls, latencies and cache hits in this process.", "performance", allowed_roles=("admin",))
 
 # Map of views → renderers
 from views.attendant import render as view_attendant
@@ -135,7 +128,10 @@ from views.gas_inventory import render as view_gas_inventory
 from views.admin_dashboard import render as view_admin_dashboard
 from views.prices_and_fees import render as view_prices_and_fees
 from views.open_day import render as view_open_day
+from views.close_day import render as view_close_day
 from views.corrections import render as view_corrections
+from views.performance import render as view_performance
+from views.export import render as view_export
 
 VIEWS = {
     "home": render_home,
@@ -145,7 +141,11 @@ VIEWS = {
     "admin_dashboard": view_admin_dashboard,
     "prices_and_fees": view_prices_and_fees,
     "open_day": view_open_day,
+    "close_day": view_close_day,
     "corrections": view_corrections,
+    "performance": view_performance,
+    "export": view_export,
 }
 
-VIEWS.get(st.session_state["view"], render_home)()
\ No newline at end of file
+view = st.session_state["view"] if st.session_state["view"] in VIEWS else "home"
+instrument("view", view)(VIEWS[view])()
\ No newline at end of file
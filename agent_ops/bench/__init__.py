@@ -0,0 +1,2 @@
+# bench/__init__.py
+# Offline benchmarks: run `python -m bench --help` from agent_ops/
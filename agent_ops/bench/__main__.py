@@ -0,0 +1,182 @@
+# bench/__main__.py
+"""
+Offline benchmarks against an in-memory Sheets stand-in.
+
+    cd agent_ops
+    python -m bench                                  # 1k..500k rows, every scenario
+    python -m bench --sizes 1000,100000 --latency 0.08 --rate-429 0.02 --out bench.csv
+
+Each scenario renders app.py through streamlit.testing.AppTest, so the views,
+caches, journal and governor are the production code paths.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+SHEET_ID = "bench"
+
+def _secrets(tmp: str, args) -> str:
+    # Must be in place before anything reads st.secrets
+    quota = args.quota or 1e9
+    path = os.path.join(tmp, "secrets.toml")
+    with open(path, "w") as f:
+        f.write(f'SHEET_ID = "{SHEET_ID}"\n'
+                f'JOURNAL_PATH = "{os.path.join(tmp, "journal.db")}"\n'
+                f'SNAPSHOT_DIR = "{os.path.join(tmp, "snapshots")}"\n'
+                f"SHEETS_READS_PER_MIN = {quota}\n"
+                f"SHEETS_WRITES_PER_MIN = {quota}\n")
+    return path
+
+def reset_process():
+    """Forget everything a fresh server process would not have."""
+    from lib import sheets, ledger, fees, rollup, config, txindex
+    for f in (sheets._sheet_cache, sheets._handle_pool, sheets._partition_index, sheets._bootstrapped):
+        f.clear()
+    ledger._snapshots.clear()
+    fees._schedule = None
+    sheets._shipped.clear()
+    sheets._errors.clear()
+    sheets._strikes.clear()
+    rollup._rollup = config._config = txindex._index = None
+
+def _app(view: str, role: str = "admin"):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.session_state["auth"] = True
+    at.session_state["username"] = role
+    at.session_state["role"] = role
+    at.session_state["view"] = view
+    return at
+
+def _run(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+# ---- scenarios: (prepare, measured) ----
+def cold_start():
+    from lib import diskcache
+    reset_process()
+    diskcache.drop()  # first start ever: nothing on disk either
+    return None, lambda _: _run(_app("home"))
+
+def restart():
+    # Redeploy after a session has run: the on-disk snapshots survive
+    from lib import sheets
+    _run(_app("home"))
+    sheets.save_snapshots(force=True)
+    reset_process()
+    return None, lambda _: _run(_app("home"))
+
+def home_render():
+    return None, lambda _: _run(_app("home"))
+
+def dashboard_load():
+    return None, lambda _: _run(_app("admin_dashboard"))
+
+def attendant_save():
+    from lib.journal import get_journal
+    from lib.sheets import flush_pending, get_client, get_spreadsheet
+
+    def measured(at):
+        at.number_input[0].set_value(1000.0)
+        next(b for b in at.button if b.label == "Save Withdrawal").click()
+        _run(at)
+        # Include shipping the row, which the flusher would do in the background
+        flush_pending(get_spreadsheet(get_client()), get_journal())
+    return _run(_app("attendant", "attendant")), measured
+
+SCENARIOS = {
+    "cold_start": cold_start,
+    "restart": restart,
+    "home_render": home_render,
+    "attendant_save": attendant_save,
+    "dashboard_load": dashboard_load,
+}
+
+def measure(http, scenario, repeat: int, memory: bool) -> dict:
+    walls, calls = [], None
+    for _ in range(repeat):
+        state, fn = scenario()
+        http.reset_counts()
+        t0 = time.perf_counter()
+        fn(state)
+        walls.append(time.perf_counter() - t0)
+        calls = (dict(http.calls), http.throttled)  # steady state: the last run
+    peak = None
+    if memory:
+        state, fn = scenario()
+        tracemalloc.start()
+        fn(state)
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    counts, throttled = calls
+    return {
+        "wall_ms": statistics.median(walls) * 1000,
+        "api_calls": sum(counts.values()),
+        "calls": " ".join(f"{k}x{v}" for k, v in sorted(counts.items())),
+        "http_429": throttled,
+        "peak_mb": peak,
+    }
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m bench", description=__doc__.strip().splitlines()[0])
+    p.add_argument("--sizes", default="1000,10000,100000,500000", help="transaction counts, comma separated")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS), help="subset of: " + ", ".join(SCENARIOS))
+    p.add_argument("--layout", choices=("legacy", "monthly"), default="legacy",
+                   help="legacy: one transactions tab; monthly: one tab per month")
+    p.add_argument("--latency", type=float, default=0.0, help="seconds added to every API call")
+    p.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    p.add_argument("--rate-429", type=float, default=0.0, help="share of API calls answered with 429")
+    p.add_argument("--quota", type=float, default=0, help="per-minute read/write quota for the governor (0 = unlimited)")
+    p.add_argument("--repeat", type=int, default=3, help="timed runs per scenario (median is reported)")
+    p.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    p.add_argument("--out", help="also write results to a .csv or .json file")
+    args = p.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="agent_ops_bench_")
+    from streamlit import config, logger
+    config.set_option("secrets.files", [_secrets(tmp, args)])
+    logger.set_log_level("error")  # bare-mode and deprecation warnings
+    sys.path.insert(0, ROOT)
+
+    import pandas as pd
+    from lib import sheets
+    from lib.utils import TZ
+    from bench.data import workbook
+    from bench.fake_gspread import FakeClient, FakeHTTPClient
+
+    http = FakeHTTPClient(args.latency, args.jitter, args.rate_429)
+    client = FakeClient(http)
+    sheets.get_client = lambda: client
+
+    today = datetime.now(TZ).date()
+    results = []
+    for n in [int(s) for s in args.sizes.split(",")]:
+        http.load(SHEET_ID, workbook(n, today, args.layout))
+        reset_process()
+        for name in args.scenarios.split(","):
+            r = measure(http, SCENARIOS[name], args.repeat, not args.no_memory)
+            results.append({"rows": n, "scenario": name, **r})
+            print(f"{n:>8,} {name:<16} {r['wall_ms']:>10.1f} ms {r['api_calls']:>4} calls"
+                  + (f" {r['peak_mb']:>8.1f} MB" if r["peak_mb"] is not None else ""), flush=True)
+
+    df = pd.DataFrame(results)
+    print()
+    print(df.to_string(index=False, float_format=lambda x: f"{x:,.1f}"))
+    if args.out:
+        if args.out.endswith(".json"):
+            df.to_json(args.out, orient="records", indent=1)
+        else:
+            df.to_csv(args.out, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench/data.py
+# Synthetic workbooks shaped like production: config sheets, one opening per
+# day and `n` transactions spread evenly over the days up to today.
+import random
+from datetime import date, timedelta
+from lib.schema import SHEETS, HEADERS, partition_of
+
+PER_DAY = 200
+
+# category, customer_method, provider_method
+_KINDS = [
+    ("cash_withdrawal", "pos", "cash"),
+    ("cash_withdrawal", "transfer", "cash"),
+    ("cash_deposit", "cash", "transfer"),
+    ("bill_payment", "cash", "transfer"),
+    ("gas_sale", "cash", ""),
+    ("charging", "cash", ""),
+]
+
+def _tx(i: int, day: str, rng: random.Random) -> list:
+    cat, cust, prov = rng.choice(_KINDS)
+    amount = float(rng.randrange(500, 50000, 500))
+    fee = 50.0 if amount <= 5000 else 100.0
+    cash = pos = transfer = gas = 0.0
+    gas_kg = price = ""
+    if cat == "cash_withdrawal":
+        cash = -amount
+        pos, transfer = (amount + fee, 0.0) if cust == "pos" else (0.0, amount + fee)
+    elif cat == "cash_deposit":
+        cash, transfer = amount + fee, -amount
+    elif cat == "bill_payment":
+        cash, transfer = amount + fee, -amount
+    elif cat == "gas_sale":
+        gas_kg, price, fee = round(amount / 1200, 2), 1200.0, 0.0
+        cash, gas = amount, -gas_kg
+    else:
+        amount, cash = 0.0, fee
+    secs = 8 * 3600 + i % PER_DAY * 180
+    return [
+        f"tx_{day.replace('-', '')}_{i:07d}", f"{day}T{secs // 3600:02d}:{secs // 60 % 60:02d}:00+01:00", day,
+        "attendant", "attendant", cat, "", cust, prov,
+        amount, gas_kg, price, fee, amount + fee if cat != "gas_sale" else amount,
+        cash, pos, transfer, gas, "", "",
+    ]
+
+def days_for(n: int, today: date) -> list:
+    ndays = max(1, -(-n // PER_DAY))
+    return [(today - timedelta(days=ndays - 1 - k)).isoformat() for k in range(ndays)]
+
+def workbook(n: int, today: date, layout: str = "legacy", seed: int = 0) -> dict:
+    """
+    {title: [header, rows...]}. layout "legacy" keeps every transaction in the
+    unpartitioned `transactions` tab; "monthly" files them by month.
+    """
+    rng = random.Random(seed)
+    days = days_for(n, today)
+    book = {s: [list(HEADERS[s])] for s in SHEETS}
+    book["config_users"] += [["admin", "admin", "ADMIN", "TRUE"], ["attendant", "attendant", "SALES", "TRUE"]]
+    book["config_prices"] += [["gas_price_per_kg", 1200], ["allow_attendant_stock_in_today", 0]]
+    book["config_fees_withdrawal"] += [[500, 5000, 50], [5000.01, 10000, 100], [10000.01, 50000, 200]]
+    book["config_fees_deposit"] += [[500, 5000, 50], [5000.01, 50000, 100]]
+    book["config_fees_bill"] += [["dstv", 100], ["electricity", 100]]
+    book["config_fees_charging"] += [["phone", 200], ["power_bank", 300]]
+    book["daily_openings"] += [[d, "attendant", 50000, 0, 20000, 100, ""] for d in days]
+    for i in range(n):
+        day = days[i // PER_DAY]
+        title = "transactions" if layout == "legacy" else partition_of("transactions", day)
+        book.setdefault(title, [list(HEADERS["transactions"])]).append(_tx(i, day, rng))
+    return book
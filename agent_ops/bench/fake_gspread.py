@@ -0,0 +1,252 @@
+# bench/fake_gspread.py
+# In-memory stand-in for the Sheets REST API. gspread's own Spreadsheet and
+# Worksheet classes run on top of it unchanged, so open_by_key, worksheet,
+# values_batch_get, append_row, update, clear ... behave as in production
+# while every request is counted, delayed and optionally answered with a 429.
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+import gspread
+from gspread.http_client import HTTPClient
+
+_A1 = re.compile(r"^([A-Z]*)(\d*)$")
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+def _col_letters(n: int) -> str:
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+def parse_range(a1: str):
+    """'tx!A7:T' -> ('tx', 7, 1, None, 20); open ends are None, rows/cols 1-based."""
+    title, bang, cells = a1.rpartition("!")
+    if not bang:
+        return a1.strip("'"), 1, 1, None, None
+    title = title.strip("'")
+    lo, _, hi = cells.partition(":")
+    c0, r0 = _A1.match(lo).groups()
+    c1, r1 = _A1.match(hi or lo).groups()
+    return (title, int(r0) if r0 else 1, _col_index(c0) if c0 else 1,
+            int(r1) if r1 else None, _col_index(c1) if c1 else None)
+
+def _entered(v):
+    # USER_ENTERED: numeric text becomes a number, like Sheets does
+    if isinstance(v, str):
+        try:
+            f = float(v)
+            return int(f) if f.is_integer() and "." not in v else f
+        except ValueError:
+            return v
+    return v
+
+def _from_cell(cell: dict):
+    v = cell.get("userEnteredValue", {})
+    return next(iter(v.values()), "")
+
+class _Response:
+    """Just enough of requests.Response for gspread.exceptions.APIError."""
+    def __init__(self, code: int, message: str):
+        self.status_code = code
+        self.text = json.dumps({"error": {"code": code, "message": message, "status": "FAKE"}})
+
+    def json(self):
+        return json.loads(self.text)
+
+class FakeHTTPClient(HTTPClient):
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0, seed: int = 0):
+        # No auth or session: nothing here goes over the network
+        self.latency, self.jitter, self.rate_429 = latency, jitter, rate_429
+        self.timeout = None
+        self.books = {}  # spreadsheet id -> {title: {"id": sheetId, "rows": [[...]], "cols": n}}
+        self.calls = Counter()
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+
+    # ---- bookkeeping ----
+    def load(self, spreadsheet_id: str, sheets: dict):
+        """Replace a workbook: {title: [header, row, ...]}."""
+        with self._lock:
+            self.books[spreadsheet_id] = {
+                t: {"id": i + 1, "rows": [list(map(_entered, r)) for r in rows],
+                    "cols": max([len(r) for r in rows] + [26])}
+                for i, (t, rows) in enumerate(sheets.items())
+            }
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+            self.throttled = 0
+
+    def _call(self, name: str, id: str, title: str = None):
+        with self._lock:
+            self.calls[name] += 1
+            book = self.books.get(id)
+            hit_429 = self._rng.random() < self.rate_429
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+        if book is None:
+            raise gspread.exceptions.APIError(_Response(404, f"Requested entity was not found: {id}"))
+        if hit_429:
+            with self._lock:
+                self.throttled += 1
+            raise gspread.exceptions.APIError(_Response(429, "Quota exceeded (simulated)"))
+        if title is not None and title not in book:
+            raise gspread.exceptions.APIError(_Response(400, f"Unable to parse range: {title}"))
+        return book
+
+    def _sheet(self, book: dict, sheet_id: int) -> dict:
+        for sh in book.values():
+            if sh["id"] == sheet_id:
+                return sh
+        raise gspread.exceptions.APIError(_Response(400, f"No grid with id: {sheet_id}"))
+
+    @staticmethod
+    def _grid_rows(sh: dict) -> int:
+        return max(1000, len(sh["rows"]))
+
+    @classmethod
+    def _read(cls, sh: dict, a1: str) -> dict:
+        _, r0, c0, r1, c1 = parse_range(a1)
+        if r0 > cls._grid_rows(sh):
+            raise gspread.exceptions.APIError(_Response(
+                400, f"Range ({a1}) exceeds grid limits. Max rows: {cls._grid_rows(sh)}, max columns: {sh['cols']}"))
+        rows = sh["rows"][r0 - 1:r1]
+        out = [r[c0 - 1:c1] for r in rows]
+        # Sheets trims trailing empty cells and rows
+        out = [r[:max([i + 1 for i, v in enumerate(r) if v != ""] + [0])] for r in out]
+        while out and not out[-1]:
+            out.pop()
+        return {"range": a1, "majorDimension": "ROWS", "values": out} if out else {"range": a1, "majorDimension": "ROWS"}
+
+    # ---- the HTTPClient surface gspread uses ----
+    def fetch_sheet_metadata(self, id, params=None):
+        book = self._call("fetch_sheet_metadata", id)
+        with self._lock:
+            return {"spreadsheetId": id, "properties": {"title": f"fake {id}"}, "sheets": [
+                {"properties": {"sheetId": sh["id"], "title": t, "index": i, "sheetType": "GRID",
+                                "gridProperties": {"rowCount": self._grid_rows(sh), "columnCount": sh["cols"]}}}
+                for i, (t, sh) in enumerate(book.items())
+            ]}
+
+    def values_get(self, id, range, params=None):
+        book = self._call("values_get", id, parse_range(range)[0])
+        with self._lock:
+            return self._read(book[parse_range(range)[0]], range)
+
+    def values_batch_get(self, id, ranges, params=None):
+        book = self._call("values_batch_get", id)
+        with self._lock:
+            for r in ranges:
+                if parse_range(r)[0] not in book:
+                    raise gspread.exceptions.APIError(_Response(400, f"Unable to parse range: {r}"))
+            return {"spreadsheetId": id, "valueRanges": [self._read(book[parse_range(r)[0]], r) for r in ranges]}
+
+    def values_append(self, id, range, params, body):
+        title = parse_range(range)[0]
+        book = self._call("values_append", id, title)
+        with self._lock:
+            sh = book[title]
+            while sh["rows"] and not any(v != "" for v in sh["rows"][-1]):
+                sh["rows"].pop()
+            first = len(sh["rows"]) + 1
+            values = [list(map(_entered, r)) for r in body.get("values", [])]
+            sh["rows"].extend(values)
+            width = max([len(r) for r in values] + [1])
+            return {"spreadsheetId": id, "updates": {
+                "updatedRange": f"{title}!A{first}:{_col_letters(width)}{first + len(values) - 1}",
+                "updatedRows": len(values),
+            }}
+
+    @staticmethod
+    def _write(sh: dict, a1: str, values: list):
+        _, r0, c0, _, _ = parse_range(a1)
+        rows = sh["rows"]
+        for i, vals in enumerate(values):
+            while len(rows) < r0 + i:
+                rows.append([])
+            row = rows[r0 - 1 + i]
+            row.extend([""] * (c0 - 1 + len(vals) - len(row)))
+            row[c0 - 1:c0 - 1 + len(vals)] = map(_entered, vals)
+
+    def values_update(self, id, range, params=None, body=None):
+        title = parse_range(range)[0]
+        book = self._call("values_update", id, title)
+        with self._lock:
+            self._write(book[title], range, body.get("values", []))
+            return {"spreadsheetId": id, "updatedRange": range}
+
+    def values_batch_update(self, id, body=None):
+        book = self._call("values_batch_update", id)
+        with self._lock:
+            data = body.get("data", [])
+            for d in data:
+                if parse_range(d["range"])[0] not in book:
+                    raise gspread.exceptions.APIError(_Response(400, f"Unable to parse range: {d['range']}"))
+            for d in data:
+                self._write(book[parse_range(d["range"])[0]], d["range"], d.get("values", []))
+            return {"spreadsheetId": id, "totalUpdatedRows": sum(len(d.get("values", [])) for d in data)}
+
+    def values_clear(self, id, range):
+        title, r0, c0, r1, c1 = parse_range(range)
+        book = self._call("values_clear", id, title)
+        with self._lock:
+            for row in book[title]["rows"][r0 - 1:r1]:
+                end = min(len(row), c1 or len(row))
+                row[c0 - 1:end] = [""] * max(0, end - c0 + 1)
+            return {"spreadsheetId": id, "clearedRange": range}
+
+    def batch_update(self, id, body):
+        book = self._call("batch_update", id)
+        replies = []
+        with self._lock:
+            for req in body.get("requests", []):
+                (kind, r), = req.items()
+                if kind == "addSheet":
+                    p = r["properties"]
+                    sid = p.get("sheetId") or max([s["id"] for s in book.values()] + [0]) + 1
+                    book[p["title"]] = {"id": sid, "rows": [], "cols": p.get("gridProperties", {}).get("columnCount", 26)}
+                    replies.append({"addSheet": {"properties": {"sheetId": sid, "title": p["title"], "index": len(book) - 1,
+                                                                "gridProperties": {"rowCount": 1000, "columnCount": book[p["title"]]["cols"]}}}})
+                    continue
+                if kind == "updateCells":
+                    g = r["range"]
+                    rows = self._sheet(book, g["sheetId"])["rows"]
+                    for i, rd in enumerate(r["rows"]):
+                        while len(rows) <= g["startRowIndex"] + i:
+                            rows.append([])
+                        row, c = rows[g["startRowIndex"] + i], g.get("startColumnIndex", 0)
+                        vals = [_from_cell(v) for v in rd.get("values", [])]
+                        row.extend([""] * (c + len(vals) - len(row)))
+                        row[c:c + len(vals)] = vals
+                elif kind == "appendCells":
+                    self._sheet(book, r["sheetId"])["rows"].extend(
+                        [[_from_cell(v) for v in rd.get("values", [])] for rd in r["rows"]])
+                elif kind == "deleteDimension" and r["range"]["dimension"] == "ROWS":
+                    g = r["range"]
+                    del self._sheet(book, g["sheetId"])["rows"][g["startIndex"]:g["endIndex"]]
+                elif kind == "appendDimension":
+                    if r["dimension"] == "COLUMNS":
+                        self._sheet(book, r["sheetId"])["cols"] += r["length"]
+                else:
+                    raise NotImplementedError(kind)
+                replies.append({})
+        return {"spreadsheetId": id, "replies": replies}
+
+class FakeClient:
+    """Drop-in for gspread.Client: open_by_key returns a real gspread.Spreadsheet."""
+    def __init__(self, http_client: FakeHTTPClient):
+        self.http_client = http_client
+
+    def open_by_key(self, key: str) -> gspread.Spreadsheet:
+        return gspread.Spreadsheet(self.http_client, {"id": key})
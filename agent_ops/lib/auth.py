@@ -1,5 +1,8 @@
 # lib/auth.py
+from datetime import datetime
 import streamlit as st
+from lib.sheets import pending_sync_count, parked_count, last_sync_error
+from lib.utils import TZ
 
 def ensure_logged_in():
     if not st.session_state.get("auth"):
@@ -38,11 +41,25 @@ def role_badge(role: str):
         </div>""", unsafe_allow_html=True
     )
 
+def sync_badge():
+    n = pending_sync_count()
+    if n:
+        st.caption(f"⏳ {n} entr{'y' if n == 1 else 'ies'} pending sync to Google Sheets")
+    err = last_sync_error()
+    if err:
+        when = datetime.fromtimestamp(err[0], TZ).strftime("%H:%M")
+        st.caption(f"⚠️ Last sync error at {when}: {err[1]}")
+    parked = parked_count()
+    if parked:
+        st.caption(f"⛔ {parked} entr{'y' if parked == 1 else 'ies'} refused by Google Sheets and set aside "
+                   "(kept in the parked table of the local journal)")
+
 def view_header(title: str, back_to="home"):
     cols = st.columns([6,2,2])
     with cols[0]: st.title(title)
     with cols[1]: role_badge(st.session_state.get("role","?"))
     with cols[2]: logout_button()
+    sync_badge()
     # NOTE: no on_click callback here; call goto() directly
     if st.button("← Back to Home", key=f"back_{title}"):
         goto(back_to)
\ No newline at end of file
@@ -0,0 +1,82 @@
+# lib/backend.py
+# Storage contract behind lib.sheets.read_df / append_row / write_df
+import pandas as pd
+import streamlit as st
+
+def secret(key: str, default=None):
+    # st.secrets raises when no secrets.toml exists; treat that as "not set"
+    try:
+        return st.secrets.get(key, default)
+    except Exception:
+        return default
+
+class Backend:
+    """
+    One implementation per store. Frames always carry the schema.HEADERS
+    columns of the sheet; `date` narrows a read to rows of that day.
+    """
+    def bootstrap(self):
+        pass
+
+    def read_df(self, sheet_name: str, date: str = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def read_range(self, sheet_name: str, start: str = None, end: str = None) -> pd.DataFrame:
+        df = self.read_df(sheet_name)
+        if "date" not in df.columns:
+            return df
+        d = df["date"].astype(str)
+        mask = (d >= str(start or "")) & (d <= str(end or "9999"))
+        return df[mask].reset_index(drop=True)
+
+    def iter_range(self, sheet_name: str, start: str = None, end: str = None):
+        """read_range as a sequence of frames, for callers that must not hold it all at once."""
+        yield self.read_range(sheet_name, start, end)
+
+    def revalidate(self, sheet_names):
+        """Bring cached copies of these sheets up to date if they may be behind."""
+        pass
+
+    def append_row(self, sheet_name: str, row: dict):
+        raise NotImplementedError
+
+    def append_rows(self, sheet_name: str, rows: list):
+        for row in rows:
+            self.append_row(sheet_name, row)
+
+    def write_df(self, sheet_name: str, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def upsert(self, sheet_name: str, row: dict, key):
+        """Replace the first row whose `key` column (or columns) equals row's, or append it."""
+        self.upsert_rows(sheet_name, [row], key)
+
+    def upsert_rows(self, sheet_name: str, rows: list, key):
+        """upsert for many rows: one write for those that exist, one append for the rest."""
+        df = self.read_df(sheet_name)
+        first = first_rows(df, key)
+        df, new = df.copy(deep=False), []
+        for row in rows:
+            i = first.get(key_of(row, key))
+            if i is None:
+                new.append(row)
+                continue
+            for c, v in row.items():
+                df[c] = df[c].astype(object)
+                df.loc[df.index[i], c] = v
+        if len(new) < len(rows):
+            self.write_df(sheet_name, df)
+        if new:
+            self.append_rows(sheet_name, new)
+
+def key_of(row: dict, key) -> tuple:
+    """row's value in the `key` column (or columns), as text."""
+    return tuple(str(row[c]) for c in ((key,) if isinstance(key, str) else key))
+
+def first_rows(df: pd.DataFrame, key) -> dict:
+    """key_of -> position of the first row of df with that key."""
+    cols = (key,) if isinstance(key, str) else key
+    first = {}
+    for i, k in enumerate(zip(*(df[c].astype(str) for c in cols))):
+        first.setdefault(k, i)
+    return first
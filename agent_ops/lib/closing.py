@@ -0,0 +1,33 @@
+# lib/closing.py
+# Day close: counted cash and gas against the ledger, frozen into one
+# closing_counts row, and carried forward as the next day's opening.
+from lib.sheets import read_df, append_row
+from lib.ledger import snapshot
+from lib.utils import now_iso, shift_day
+
+def closing_for(date: str):
+    """The closing_counts row of `date` as a dict, or None if the day is open."""
+    closes = read_df("closing_counts", date=date)
+    return None if closes.empty else closes.iloc[-1].to_dict()
+
+def close_day(date: str, cash_counted: float, gas_measured_kg: float, notes: str = "", user: str = "") -> dict:
+    if closing_for(date) is not None:
+        raise ValueError(f"{date} is already closed")
+    s = snapshot(date)
+    row = {
+        "date": date, "cash_counted": cash_counted, "gas_measured_kg": gas_measured_kg, "notes": notes,
+        "cash_expected": s.cash, "pos_expected": s.pos, "transfer_expected": s.transfer, "gas_expected_kg": s.gas,
+        "cash_variance": cash_counted - s.cash, "gas_variance_kg": gas_measured_kg - s.gas,
+        "tx_count": s.count, "fees": s.fees, "gas_revenue": s.gas_revenue,
+        "closed_by": user, "closed_at": now_iso(),
+    }
+    append_row("closing_counts", row)
+    # Seed tomorrow unless someone already opened it
+    nxt = shift_day(date, 1)
+    if read_df("daily_openings", date=nxt).empty:
+        append_row("daily_openings", {
+            "date": nxt, "attendant": "", "cash_open": cash_counted, "pos_open": s.pos,
+            "transfer_open": s.transfer, "gas_open_kg": gas_measured_kg,
+            "notes": f"Carried forward from close of {date}",
+        })
+    return row
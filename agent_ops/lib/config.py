@@ -0,0 +1,51 @@
+# lib/config.py
+# Prices, flags and fees as one typed snapshot, rebuilt only when a config sheet
+# changes. Screens read from it instead of scanning frames on every rerun.
+import threading
+from lib.sheets import read_df, upsert, data_version, fresh_version
+from lib.fees import FEE_SHEETS, FeeSchedule, fee_schedule
+
+CONFIG_SHEETS = ("config_prices",) + FEE_SHEETS
+_TRUE = ("true", "yes", "y", "on")
+
+class Config:
+    """`version` is the data version of CONFIG_SHEETS it was built from."""
+    def __init__(self, prices, fees: FeeSchedule, version=None):
+        self.values = {}
+        for k, v in zip(prices["key"].astype(str), prices["value"]):
+            self.values.setdefault(k, v)  # first row wins, as before
+        self.fees = fees
+        self.version = version
+
+    def price(self, key: str, default=0.0) -> float:
+        try:
+            return float(self.values[key])
+        except (KeyError, TypeError, ValueError):
+            return default
+
+    def flag(self, key: str, default=False) -> bool:
+        if key not in self.values:
+            return default
+        v = str(self.values[key]).strip().lower()
+        try:
+            return float(v) != 0  # 1, 1.0
+        except ValueError:
+            return v in _TRUE
+
+_config = None
+_lock = threading.Lock()
+
+def config() -> Config:
+    global _config
+    version = fresh_version(*CONFIG_SHEETS)
+    with _lock:
+        if _config is not None and _config.version == version:
+            return _config
+    cfg = Config(read_df("config_prices"), fee_schedule(), version=data_version(*CONFIG_SHEETS))
+    with _lock:
+        _config = cfg
+    return cfg
+
+def set_value(key: str, value):
+    """Change one config_prices key in place (one row written, not the sheet)."""
+    upsert("config_prices", {"key": key, "value": value})
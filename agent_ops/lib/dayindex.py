@@ -0,0 +1,44 @@
+# lib/dayindex.py
+# date -> (start, stop) over a frame's rows, so one day is a slice, not a scan.
+import numpy as np
+
+def _runs(dates: np.ndarray, offset: int):
+    """(date, start, stop) for each run of equal dates, positions shifted by offset."""
+    cuts = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+    starts = np.concatenate(([0], cuts))
+    stops = np.concatenate((cuts, [len(dates)]))
+    return zip(dates[starts].tolist(), (starts + offset).tolist(), (stops + offset).tolist())
+
+def _is_sorted(dates: np.ndarray) -> bool:
+    return len(dates) < 2 or bool((dates[1:] >= dates[:-1]).all())
+
+class DayIndex:
+    """
+    `order` is None while the rows are already in date order (the usual case:
+    they are appended day by day) and a day is a plain positional slice.
+    Otherwise it holds the stable date sort and a day is order[start:stop].
+    """
+    def __init__(self, dates: np.ndarray):
+        self.n = len(dates)
+        self.order = None if _is_sorted(dates) else np.argsort(dates, kind="stable")
+        ordered = dates if self.order is None else dates[self.order]
+        self.bounds = {d: (a, b) for d, a, b in _runs(ordered, 0)} if self.n else {}
+        self.last = ordered[-1] if self.n else None
+
+    def extend(self, dates: np.ndarray) -> bool:
+        """Index rows appended after the indexed ones; False if they break date order (rebuild instead)."""
+        if not len(dates):
+            return True
+        if self.order is not None or (self.last is not None and dates[0] < self.last) or not _is_sorted(dates):
+            return False
+        for d, a, b in _runs(dates, self.n):
+            # Only the run continuing the last indexed day can already be present
+            self.bounds[d] = (self.bounds[d][0], b) if d in self.bounds else (a, b)
+        self.n += len(dates)
+        self.last = dates[-1]
+        return True
+
+    def rows(self, date: str):
+        """Positions of `date`'s rows: a slice when sorted, else an array (empty if none)."""
+        a, b = self.bounds.get(date, (0, 0))
+        return slice(a, b) if self.order is None else self.order[a:b]
@@ -0,0 +1,46 @@
+# lib/diskcache.py
+# Last good read of a sheet kept on local disk as an uncompressed Arrow (Feather)
+# file, so a restarted process can start from it instead of from Sheets.
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from lib.backend import secret
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".data", "snapshots")
+
+def _path(name: str) -> str:
+    return os.path.join(secret("SNAPSHOT_DIR", DEFAULT_DIR), f"{name}.arrow")
+
+def save(name: str, df: pd.DataFrame, tag: dict):
+    """Write df with `tag` (rows, fingerprint, ...) in the file's metadata; replaces atomically."""
+    path = _path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           b"agent_ops": json.dumps({**tag, "rows": len(df)}).encode()})
+    tmp = f"{path}.tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")  # uncompressed so it can be memory-mapped
+    os.replace(tmp, path)
+
+def load(name: str, tag: dict):
+    """The saved frame if its tag matches `tag` and its row count checks out, else None."""
+    path = _path(name)
+    try:
+        table = feather.read_table(path, memory_map=True)
+        saved = json.loads(table.schema.metadata[b"agent_ops"])
+    except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+        return None
+    if any(saved.get(k) != v for k, v in tag.items()) or saved.get("rows") != table.num_rows:
+        return None
+    return table.to_pandas()
+
+def drop():
+    """Delete every snapshot; the next start reads Sheets in full."""
+    folder = secret("SNAPSHOT_DIR", DEFAULT_DIR)
+    if not os.path.isdir(folder):
+        return
+    for f in os.listdir(folder):
+        if f.endswith(".arrow"):
+            os.remove(os.path.join(folder, f))
@@ -0,0 +1,57 @@
+# lib/export.py
+# Transactions for a date range as CSV or Parquet. Rows are written to a
+# temporary file one partition (or page) at a time, so a year's extract never
+# exists as one DataFrame; only the finished file is handed to the browser.
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from lib.schema import HEADERS, TYPES, MONEY, KG, COUNT, DATETIME
+from lib.sheets import iter_range
+
+FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/vnd.apache.parquet")}
+
+def _arrow_schema(sheet_name: str) -> pa.Schema:
+    # Fixed up front: per-chunk inference would differ (categories, empty chunks)
+    types = TYPES.get(sheet_name, {})
+    kinds = {MONEY: pa.float64(), KG: pa.float64(), COUNT: pa.int64(),
+             DATETIME: pa.timestamp("ns", tz="Africa/Lagos")}
+    return pa.schema([(h, kinds.get(types.get(h), pa.string())) for h in HEADERS[sheet_name]])
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    # Categoricals as text, so every chunk has the same column types
+    return df.astype({c: str for c in df.columns if df[c].dtype == "category"})
+
+def write_csv(chunks, f, sheet_name: str = "transactions") -> int:
+    f.write((",".join(HEADERS[sheet_name]) + "\n").encode("utf-8"))
+    n = 0
+    for df in chunks:
+        f.write(_plain(df).to_csv(index=False, header=False).encode("utf-8"))
+        n += len(df)
+    return n
+
+def write_parquet(chunks, f, sheet_name: str = "transactions") -> int:
+    schema = _arrow_schema(sheet_name)
+    n = 0
+    with pq.ParquetWriter(f, schema) as w:
+        for df in chunks:
+            w.write_table(pa.Table.from_pandas(_plain(df), schema=schema, preserve_index=False))
+            n += len(df)
+    return n
+
+def export_transactions(start: str, end: str, fmt: str = "CSV", progress=None):
+    """
+    (file, rows) for transactions dated start..end; the file is an anonymous
+    temporary file rewound to the start. `progress(rows)` is called per chunk.
+    """
+    def chunks():
+        n = 0
+        for df in iter_range("transactions", start, end):
+            yield df
+            n += len(df)
+            if progress:
+                progress(n)
+    f = tempfile.TemporaryFile()
+    n = (write_parquet if fmt == "Parquet" else write_csv)(chunks(), f)
+    f.seek(0)
+    return f, n
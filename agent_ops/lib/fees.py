@@ -1,4 +1,10 @@
+import threading
+import numpy as np
 import pandas as pd
+from lib.sheets import read_df, data_version, fresh_version
+from lib.metrics import instrument
+
+FEE_SHEETS = ("config_fees_withdrawal", "config_fees_deposit", "config_fees_bill", "config_fees_charging")
 
 def coerce_numeric(df, cols):
     for c in cols:
@@ -6,34 +12,107 @@ def coerce_numeric(df, cols):
             df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0.0)
     return df
 
+class TierTable:
+    """
+    Tier fees compiled to sorted NumPy arrays.
+    Ranges semantics: [min, max] inclusive for first; (prev_max, next_max] for next rows,
+    written as next_min = prev_max + 0.01 (e.g. 500–5000, 5000.01–10000).
+    """
+    def __init__(self, df_tiers: pd.DataFrame):
+        df = coerce_numeric(df_tiers.copy(deep=False), ["min_amount","max_amount","fee"])
+        if not {"min_amount","max_amount","fee"}.issubset(df.columns):
+            df = pd.DataFrame({"min_amount": [], "max_amount": [], "fee": []})
+        df = df.sort_values(["min_amount","max_amount"], kind="stable")
+        self.mins = df["min_amount"].to_numpy(dtype=float)
+        self.maxs = df["max_amount"].to_numpy(dtype=float)
+        self.fees = df["fee"].to_numpy(dtype=float)
+        self.problems = self._validate()
+        self.overlapping = any(self.mins[1:] <= self.maxs[:-1])
+
+    def _validate(self) -> list:
+        out = []
+        for mn, mx in zip(self.mins, self.maxs):
+            if mn > mx:
+                out.append(f"Tier {mn:,.2f}–{mx:,.2f}: min is above max.")
+        for (pmn, pmx), (mn, mx) in zip(zip(self.mins, self.maxs), zip(self.mins[1:], self.maxs[1:])):
+            step = round(mn - pmx, 2)
+            if step <= 0:
+                out.append(f"Tiers {pmn:,.2f}–{pmx:,.2f} and {mn:,.2f}–{mx:,.2f} overlap.")
+            elif step > 0.01:
+                out.append(f"No tier covers amounts between {pmx:,.2f} and {mn:,.2f}.")
+        return out
+
+    @instrument("fees")
+    def fees_for(self, amounts) -> np.ndarray:
+        """Fee for every amount in one call; 0.0 where no tier matches."""
+        a = np.asarray(amounts, dtype=float)
+        if len(self.mins) == 0:
+            return np.zeros_like(a)
+        if self.overlapping:
+            # Keep "first matching tier wins" exactly when tiers overlap
+            hit = (a[..., None] >= self.mins) & (a[..., None] <= self.maxs)
+            first = hit.argmax(axis=-1)
+            return np.where(hit.any(axis=-1), self.fees[first], 0.0)
+        i = np.searchsorted(self.mins, a, side="right") - 1
+        ok = (i >= 0) & (a <= self.maxs[np.clip(i, 0, None)])
+        return np.where(ok, self.fees[np.clip(i, 0, None)], 0.0)
+
+    def fee(self, amount) -> float:
+        return float(self.fees_for([amount])[0])
+
+def _lookup(df: pd.DataFrame, key_col: str) -> dict:
+    # First row wins for a key, matched case-insensitively
+    if key_col not in df.columns or "fee" not in df.columns:
+        return {}
+    fees = pd.to_numeric(df["fee"], errors="coerce")
+    out = {}
+    for k, v in zip(df[key_col].astype(str).str.lower(), fees):
+        if k not in out:
+            out[k] = 0.0 if pd.isna(v) else float(v)
+    return out
+
+class FeeSchedule:
+    """All fee config compiled once; rebuilt by fee_schedule() when a fee sheet changes."""
+    def __init__(self, withdrawal, deposit, bills, charging, version=None):
+        self.withdrawal = TierTable(withdrawal)
+        self.deposit = TierTable(deposit)
+        self.bills = _lookup(bills, "bill_type")
+        self.charging = _lookup(charging, "category")
+        self.version = version
+
+    @instrument("fees")
+    def bill_fee(self, bill_type: str) -> float:
+        return self.bills.get(str(bill_type).lower(), 0.0)
+
+    @instrument("fees")
+    def charging_fee(self, category: str) -> float:
+        return self.charging.get(str(category).lower(), 0.0)
+
+_schedule = None
+_lock = threading.Lock()
+
+@instrument("fees")
+def fee_schedule() -> FeeSchedule:
+    global _schedule
+    version = fresh_version(*FEE_SHEETS)
+    with _lock:
+        if _schedule is not None and _schedule.version == version:
+            return _schedule
+    frames = [read_df(s) for s in FEE_SHEETS]
+    fs = FeeSchedule(*frames, version=data_version(*FEE_SHEETS))
+    with _lock:
+        _schedule = fs
+    return fs
+
+# ---- frame-based helpers (compile on every call; prefer fee_schedule()) ----
+@instrument("fees")
 def fee_from_tiers(amount, df_tiers: pd.DataFrame) -> float:
-    # Ranges semantics: [min, max] inclusive for first; (prev_max, next_max] for next rows
-    df = df_tiers.copy()
-    df = coerce_numeric(df, ["min_amount","max_amount","fee"])
-    df = df.sort_values(["min_amount","max_amount"])
-    # Find the first row where amount >= min and amount <= max
-    for _, r in df.iterrows():
-        mn, mx, fee = float(r["min_amount"]), float(r["max_amount"]), float(r["fee"])
-        if amount >= mn and amount <= mx:
-            return fee
-    return 0.0
+    return TierTable(df_tiers).fee(amount)
 
+@instrument("fees")
 def bill_fee(bill_type: str, df_bills: pd.DataFrame) -> float:
-    df = df_bills.copy()
-    if "bill_type" not in df.columns or "fee" not in df.columns: return 0.0
-    row = df[df["bill_type"].str.lower() == str(bill_type).lower()]
-    if row.empty: return 0.0
-    try:
-        return float(row.iloc[0]["fee"])
-    except Exception:
-        return 0.0
+    return _lookup(df_bills, "bill_type").get(str(bill_type).lower(), 0.0)
 
+@instrument("fees")
 def charging_fee(category: str, df_charge: pd.DataFrame) -> float:
-    df = df_charge.copy()
-    if "category" not in df.columns or "fee" not in df.columns: return 0.0
-    row = df[df["category"].str.lower() == str(category).lower()]
-    if row.empty: return 0.0
-    try:
-        return float(row.iloc[0]["fee"])
-    except Exception:
-        return 0.0
\ No newline at end of file
+    return _lookup(df_charge, "category").get(str(category).lower(), 0.0)
@@ -0,0 +1,124 @@
+# lib/governor.py
+# Every gspread call in the process goes through one Governor: token buckets
+# sized to the Sheets per-minute quotas, one shared backoff after a 429, writes
+# ahead of reads, and identical concurrent reads collapsed into one request.
+import random
+import threading
+import time
+from concurrent.futures import Future
+import streamlit as st
+from gspread.exceptions import APIError
+from lib.backend import secret
+from lib.metrics import get_metrics
+
+# gspread methods that count against the write quota
+WRITE_CALLS = {
+    "append_row", "append_rows", "update", "clear", "add_worksheet", "batch_update",
+    "values_append", "values_update", "values_batch_update", "values_clear",
+}
+RETRY_CODES = (429, 500, 503)
+MAX_TRIES = 6
+BACKOFF_BASE = 1.0   # seconds; doubles per attempt
+BACKOFF_CAP = 32.0
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def ready(self, now: float) -> bool:
+        """Whether a token is available, without taking it."""
+        self._refill(now)
+        return self.tokens >= 1
+
+    def wait_time(self, now: float) -> float:
+        """Take a token and return 0, or return how long until one is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class Governor:
+    def __init__(self, reads_per_min: float = 60, writes_per_min: float = 60):
+        self._cond = threading.Condition()
+        self._buckets = {False: _Bucket(reads_per_min), True: _Bucket(writes_per_min)}
+        self._writers_waiting = 0
+        self._paused_until = 0.0
+        self._inflight = {}
+
+    def _acquire(self, write: bool):
+        with self._cond:
+            if write:
+                self._writers_waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now < self._paused_until:
+                        self._cond.wait(self._paused_until - now)
+                        continue
+                    if not write and self._writers_waiting and self._buckets[True].ready(now):
+                        # Writes go first, but only a writer that can go now; one waiting
+                        # on its own empty bucket does not hold reads back
+                        self._cond.wait(0.05)
+                        continue
+                    delay = self._buckets[write].wait_time(now)
+                    if delay == 0:
+                        return
+                    self._cond.wait(delay)
+            finally:
+                if write:
+                    self._writers_waiting -= 1
+                    self._cond.notify_all()
+
+    def _run(self, fn, write: bool, args, kwargs):
+        for attempt in range(MAX_TRIES):
+            self._acquire(write)
+            try:
+                return fn(*args, **kwargs)
+            except APIError as e:
+                code = getattr(getattr(e, "response", None), "status_code", None)
+                if code not in RETRY_CODES or attempt == MAX_TRIES - 1:
+                    raise
+                # Exponential backoff with jitter so sessions do not retry in lockstep
+                delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+                get_metrics().record("sheets", getattr(fn, "__name__", "?"), delay * 1000, status=f"retry {code}")
+                if code == 429:
+                    with self._cond:
+                        # Quota is shared, so everyone waits, not just this caller
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                time.sleep(delay)
+
+    def call(self, fn, *args, **kwargs):
+        write = getattr(fn, "__name__", "") in WRITE_CALLS
+        if write:
+            return self._run(fn, True, args, kwargs)
+        owner = getattr(fn, "__self__", None)
+        key = (type(owner).__name__, getattr(owner, "id", id(owner)), fn.__name__, repr(args), repr(sorted(kwargs.items())))
+        with self._cond:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+        if not leader:
+            return fut.result()  # same read already on the wire; share its answer
+        try:
+            result = self._run(fn, False, args, kwargs)
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+
+@st.cache_resource
+def get_governor() -> Governor:
+    return Governor(float(secret("SHEETS_READS_PER_MIN", 60)), float(secret("SHEETS_WRITES_PER_MIN", 60)))
@@ -0,0 +1,133 @@
+# lib/journal.py
+# Durable write-ahead journal: rows are committed to a local SQLite file first
+# and drained to Google Sheets in batches by the flusher in lib/sheets.py.
+import json
+import os
+import sqlite3
+import threading
+import streamlit as st
+from lib.backend import secret
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".data", "journal.db")
+
+class Journal:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " sheet TEXT NOT NULL,"
+            " row TEXT NOT NULL,"
+            " sent INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Rows Sheets kept refusing; set aside so the rows behind them still sync
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parked ("
+            " seq INTEGER PRIMARY KEY,"
+            " sheet TEXT NOT NULL,"
+            " row TEXT NOT NULL,"
+            " error TEXT NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self.wake = threading.Event()
+        # In-memory mirror of the table so reads never touch disk: sheet -> [(seq, values)]
+        self._rows = {}
+        # Rows that were handed to Sheets before a crash; may already be there
+        self.unconfirmed = set()
+        for seq, sheet, row, sent in self._db.execute("SELECT seq, sheet, row, sent FROM pending ORDER BY seq"):
+            self._rows.setdefault(sheet, []).append((seq, json.loads(row)))
+            if sent:
+                self.unconfirmed.add(seq)
+
+    def add(self, sheet: str, values: list) -> int:
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO pending (sheet, row) VALUES (?, ?)",
+                (sheet, json.dumps(values, default=str)),
+            )
+            self._rows.setdefault(sheet, []).append((cur.lastrowid, values))
+        self.wake.set()
+        return cur.lastrowid
+
+    def add_many(self, sheet: str, rows: list) -> list:
+        # One disk commit for the lot
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                seqs = [self._db.execute("INSERT INTO pending (sheet, row) VALUES (?, ?)",
+                                         (sheet, json.dumps(v, default=str))).lastrowid for v in rows]
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._rows.setdefault(sheet, []).extend(zip(seqs, rows))
+        self.wake.set()
+        return seqs
+
+    def pending(self, sheet: str) -> list:
+        """(seq, values) of the sheet's queued rows, oldest first."""
+        with self._lock:
+            return list(self._rows.get(sheet, []))
+
+    def sheets(self) -> list:
+        with self._lock:
+            return [s for s, rows in self._rows.items() if rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._rows.values())
+
+    def next_batch(self, limit: int = 500, sheet: str = None):
+        """Oldest queued rows of one sheet, in order: (sheet, [(seq, values)])."""
+        with self._lock:
+            if sheet is None:
+                heads = [(rows[0][0], s) for s, rows in self._rows.items() if rows]
+                if not heads:
+                    return None, []
+                sheet = min(heads)[1]
+            return sheet, list(self._rows.get(sheet, [])[:limit])
+
+    def mark_sent(self, seqs: list):
+        with self._lock:
+            self._db.executemany("UPDATE pending SET sent = 1 WHERE seq = ?", [(s,) for s in seqs])
+            self.unconfirmed.update(seqs)
+
+    def verified(self, seqs: list):
+        # Checked against the sheet and found missing: safe to send again
+        with self._lock:
+            self.unconfirmed.difference_update(seqs)
+
+    def ack(self, sheet: str, seqs: list):
+        done = set(seqs)
+        with self._lock:
+            self._db.executemany("DELETE FROM pending WHERE seq = ?", [(s,) for s in seqs])
+            self._rows[sheet] = [r for r in self._rows.get(sheet, []) if r[0] not in done]
+            self.unconfirmed -= done
+
+    def park(self, sheet: str, seqs: list, error: str):
+        """Move rows out of the queue into `parked`, keeping them for an admin to look at."""
+        done = set(seqs)
+        with self._lock:
+            rows = [r for r in self._rows.get(sheet, []) if r[0] in done]
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO parked (seq, sheet, row, error) VALUES (?, ?, ?, ?)",
+                                     [(seq, sheet, json.dumps(v, default=str), error) for seq, v in rows])
+                self._db.executemany("DELETE FROM pending WHERE seq = ?", [(s,) for s in seqs])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._rows[sheet] = [r for r in self._rows.get(sheet, []) if r[0] not in done]
+            self.unconfirmed -= done
+
+    def parked_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM parked").fetchone()[0]
+
+@st.cache_resource
+def get_journal() -> Journal:
+    return Journal(secret("JOURNAL_PATH", DEFAULT_PATH))
@@ -0,0 +1,143 @@
+# lib/ledger.py
+# One computation of a day's balances and KPIs, shared by every screen.
+import threading
+import pandas as pd
+from lib.sheets import read_df, data_version, fresh_version, on_append
+from lib.rollup import summary
+from lib.utils import today_str, shift_day
+
+DELTAS = ["cash_delta", "pos_delta", "transfer_delta", "gas_kg_delta"]
+OPENINGS = {"cash_delta": "cash_open", "pos_delta": "pos_open",
+            "transfer_delta": "transfer_open", "gas_kg_delta": "gas_open_kg"}
+# Balances a day close leaves behind: counted where counted, else what was expected
+CLOSINGS = {"cash_delta": "cash_counted", "pos_delta": "pos_expected",
+            "transfer_delta": "transfer_expected", "gas_kg_delta": "gas_measured_kg"}
+VERSIONED = ("transactions", "daily_openings", "closing_counts")
+
+def _num(x) -> float:
+    try:
+        v = float(x)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if v != v else v
+
+def _carried(date: str, opens: pd.DataFrame):
+    """
+    Opening balances for a day nobody opened: the latest checkpoint before it
+    (a day's opening or a day's close, whichever is later) plus the rolled-up
+    deltas of the days in between. None when there is no checkpoint.
+    """
+    closes = read_df("closing_counts")
+    od, cd = opens["date"].astype(str), closes["date"].astype(str)
+    o_last = od[od < date].max() if (od < date).any() else None
+    c_last = cd[cd < date].max() if (cd < date).any() else None
+    if o_last is not None and (c_last is None or o_last > c_last):
+        o = opens[od == o_last].iloc[0]
+        base = {c: _num(o[OPENINGS[c]]) for c in DELTAS}
+        since, source = o_last, f"opening of {o_last}"
+    elif c_last is not None:
+        c = closes[cd == c_last].iloc[-1]
+        base = {c_: _num(c[CLOSINGS[c_]]) for c_ in DELTAS}
+        since, source = shift_day(c_last, 1), f"close of {c_last}"
+    else:
+        return None
+    if since < date:
+        gap = summary(since, shift_day(date, -1))
+        base = {c: base[c] + float(gap[c].sum()) for c in DELTAS}
+    return source, base
+
+class LedgerSnapshot:
+    """
+    Opening balances plus running sums of one day's transactions. `version` is
+    the data version of VERSIONED it reflects.
+    """
+    def __init__(self, date: str, version: tuple):
+        self.date = date
+        self.version = version
+        self.has_opening = False
+        self.opening_source = None  # "opening", or the checkpoint balances were carried from
+        self.opening = {c: 0.0 for c in DELTAS}
+        self.sums = {c: 0.0 for c in DELTAS}
+        self.fees = 0.0
+        self.gas_revenue = 0.0
+        self.mix = {}
+        self.count = 0
+
+    @classmethod
+    def build(cls, date: str) -> "LedgerSnapshot":
+        # Read first: a cache refresh inside read_df may bump the version
+        opens = read_df("daily_openings")
+        op = opens[opens["date"] == date]
+        tx = read_df("transactions", date=date)
+        carried = None if not op.empty else _carried(date, opens)
+        snap = cls(date, data_version(*VERSIONED))
+        if not op.empty:
+            o = op.iloc[0]
+            snap.has_opening = True
+            snap.opening = {c: _num(o.get(OPENINGS[c], 0)) for c in DELTAS}
+            snap.opening_source = "opening"
+        elif carried is not None:
+            snap.has_opening = True
+            snap.opening_source, snap.opening = carried
+        if not tx.empty:
+            # Columns arrive typed (lib.schema.TYPES), so no coercion here
+            snap.sums = {c: float(tx[c].sum()) for c in DELTAS}
+            snap.fees = float(tx["fee"].sum())
+            snap.gas_revenue = float(tx.loc[tx["category"] == "gas_sale", "amount_value"].sum())
+            mix = tx["category"].value_counts()
+            snap.mix = mix[mix > 0].to_dict()  # categoricals also count unused categories
+            snap.count = len(tx)
+        return snap
+
+    def add(self, row: dict):
+        for c in DELTAS:
+            self.sums[c] += _num(row.get(c))
+        self.fees += _num(row.get("fee"))
+        if row.get("category") == "gas_sale":
+            self.gas_revenue += _num(row.get("amount_value"))
+        cat = row.get("category", "")
+        self.mix[cat] = self.mix.get(cat, 0) + 1
+        self.count += 1
+
+    def expected(self, col: str) -> float:
+        return self.opening[col] + self.sums[col]
+
+    @property
+    def cash(self): return self.expected("cash_delta")
+    @property
+    def pos(self): return self.expected("pos_delta")
+    @property
+    def transfer(self): return self.expected("transfer_delta")
+    @property
+    def gas(self): return self.expected("gas_kg_delta")
+
+    def service_mix(self) -> pd.DataFrame:
+        mix = pd.DataFrame(list(self.mix.items()), columns=["category", "count"])
+        return mix.sort_values("count", ascending=False).reset_index(drop=True)
+
+_snapshots = {}  # date -> LedgerSnapshot
+_lock = threading.Lock()
+
+def snapshot(date: str = None) -> LedgerSnapshot:
+    """The day's snapshot, rebuilt only when its data version moved."""
+    date = date or today_str()
+    version = fresh_version(*VERSIONED)
+    with _lock:
+        snap = _snapshots.get(date)
+        if snap is not None and snap.version == version:
+            return snap
+    snap = LedgerSnapshot.build(date)
+    with _lock:
+        _snapshots[date] = snap
+    return snap
+
+@on_append
+def _on_append(sheet_name, row, old, new):
+    # Fold an appended transaction into its day's snapshot instead of rebuilding
+    if sheet_name != "transactions":
+        return
+    with _lock:
+        snap = _snapshots.get(row.get("date"))
+        if snap is not None and snap.version[0] == old:
+            snap.add(row)
+            snap.version = (new,) + snap.version[1:]
@@ -0,0 +1,96 @@
+# lib/metrics.py
+# In-process instrumentation: every timed call lands in a bounded ring buffer
+# that the admin Performance view summarises and exports.
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import streamlit as st
+from lib.backend import secret
+
+COLUMNS = ["ts", "kind", "name", "ms", "bytes", "status"]
+
+class Metrics:
+    def __init__(self, size: int = 5000):
+        self._events = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started = time.time()
+
+    def record(self, kind: str, name: str, ms: float = 0.0, nbytes: int = 0, status: str = "ok"):
+        with self._lock:
+            self._events.append((time.time(), kind, name, ms, nbytes, status))
+
+    def add_bytes(self, n: int):
+        # Counted per thread so a timed block only sees its own traffic
+        self._local.bytes = getattr(self._local, "bytes", 0) + n
+
+    @contextmanager
+    def timed(self, kind: str, name: str, status: str = "ok"):
+        start, before = time.perf_counter(), getattr(self._local, "bytes", 0)
+        try:
+            yield
+        except Exception:
+            status = "error"  # st.stop()/st.rerun() are BaseExceptions and count as ok
+            raise
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.record(kind, name, ms, getattr(self._local, "bytes", 0) - before, status)
+
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            rows = list(self._events)
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        df["ts"] = pd.to_datetime(df["ts"], unit="s", utc=True).dt.tz_convert("Africa/Lagos")
+        return df
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+        self.started = time.time()
+
+def summary(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (kind, name): calls, latency percentiles and bytes. Retry
+    events ("retry <status>") are counted but kept out of the latencies.
+    """
+    cols = ["kind", "name", "count", "errors", "hits", "misses", "retries", "throttled",
+            "p50_ms", "p95_ms", "p99_ms", "max_ms", "bytes"]
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    out = []
+    for (kind, name), g in df.groupby(["kind", "name"], sort=True):
+        retry = g["status"].str.startswith("retry")
+        calls, s = g[~retry], g["status"]
+        ms = calls["ms"].to_numpy() if len(calls) else np.zeros(1)
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        out.append([kind, name, len(calls), int((s == "error").sum()), int((s == "hit").sum()),
+                    int((s == "miss").sum()), int(retry.sum()), int((s == "retry 429").sum()),
+                    p50, p95, p99, ms.max(), int(g["bytes"].sum())])
+    return pd.DataFrame(out, columns=cols)
+
+@st.cache_resource
+def get_metrics() -> Metrics:
+    return Metrics(int(secret("METRICS_BUFFER", 5000)))
+
+def timed(kind: str, name: str, status: str = "ok"):
+    return get_metrics().timed(kind, name, status)
+
+def instrument(kind: str, name: str = None):
+    """Decorator: time every call of the function under (kind, name)."""
+    def wrap(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with timed(kind, label):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def count_response_bytes(response, *args, **kwargs):
+    """requests response hook: request + response body sizes."""
+    body = response.request.body or b""
+    get_metrics().add_bytes(len(response.content or b"") + len(body))
@@ -0,0 +1,207 @@
+# lib/rollup.py
+# Per-day transaction aggregates (date x category x methods) for range views.
+# Finished days live in the daily_summary sheet; days since the last stored one
+# are kept in memory and folded forward on every append, so a year of history
+# costs a few thousand summary rows instead of every transaction. A stored day
+# that later gets rows is counted again and its summary rows replaced.
+import bisect
+import threading
+import numpy as np
+import pandas as pd
+from lib.schema import HEADERS, concat_typed, typed
+from lib.sheets import read_df, iter_range, append_rows, upsert_rows, data_version, fresh_version, on_append, live_since
+from lib.utils import today_str, shift_day
+
+GROUP = ["date", "category", "customer_method", "provider_method"]
+SUMS = ["amount_value", "fee", "gas_kg", "cash_delta", "pos_delta", "transfer_delta", "gas_kg_delta"]
+COLUMNS = HEADERS["daily_summary"]
+
+def _num(x) -> float:
+    try:
+        v = float(x)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if v != v else v
+
+def summarize(tx: pd.DataFrame) -> pd.DataFrame:
+    """Transactions -> daily_summary rows."""
+    if tx.empty:
+        return typed("daily_summary", pd.DataFrame(columns=COLUMNS))
+    g = tx.groupby([tx[c].astype(str) for c in GROUP], sort=True)
+    out = g[SUMS].sum()
+    out.insert(0, "count", g.size())
+    return typed("daily_summary", out.reset_index()[COLUMNS])
+
+class DailyRollup:
+    """
+    `stored` holds summary rows already in daily_summary; `live` maps a group
+    key of a later day to [count, *SUMS]. A key in `redo` is of a stored day
+    that got rows after it was stored: its live value replaces the stored row.
+    `version` is the transactions data version it reflects.
+    """
+    def __init__(self, stored: pd.DataFrame, version: tuple):
+        self.stored = stored
+        self.last = stored["date"].astype(str).max() if len(stored) else ""
+        self.live = {}
+        self.redo = set()
+        self.version = version
+
+    @classmethod
+    def build(cls) -> "DailyRollup":
+        # Read first: a cache refresh inside read_df may bump the version
+        r = cls(read_df("daily_summary"), None)
+        # First build ever backfills from all history; afterwards the unsummarized days, and
+        # the stored ones of the live partitions: a row can still land there after its day
+        # was stored (another process's queue, a journal drained after midnight).
+        # A partition at a time and around the cache, so history is not pinned in memory
+        start = min(shift_day(r.last, 1), live_since()) if r.last else None
+        seen = {}
+        for tx in iter_range("transactions", start, None):
+            for row in summarize(tx).itertuples(index=False):
+                key = tuple(str(getattr(row, c)) for c in GROUP)
+                vals = np.array([row.count] + [getattr(row, c) for c in SUMS], dtype=float)
+                if key[0] > r.last:
+                    r._fold(key, vals)
+                else:
+                    seen[key] = vals if key not in seen else seen[key] + vals
+        r._recheck(seen)
+        r.version = data_version("transactions")
+        return r
+
+    def _recheck(self, seen: dict):
+        """Queue for replacement the stored rows that differ from `seen`, recounted from transactions."""
+        days = {k[0] for k in seen}
+        d = self.stored["date"].astype(str)
+        have = {tuple(str(getattr(row, c)) for c in GROUP): np.array([row.count] + [getattr(row, c) for c in SUMS], dtype=float)
+                for row in self.stored[d.isin(days)].itertuples(index=False)}
+        late = {k: v for k, v in seen.items() if k not in have or not np.allclose(have[k], v)}
+        if late:
+            self._drop(late)
+            self.live.update(late)
+            self.redo.update(late)
+
+    def _drop(self, keys):
+        stored = pd.MultiIndex.from_frame(self.stored[GROUP].astype(str))
+        self.stored = self.stored[~stored.isin(list(keys))]
+
+    def add(self, row: dict):
+        key = tuple(str(row.get(c, "")) for c in GROUP)
+        if key[0] <= self.last and key not in self.redo:
+            # A late row of a stored day: that group is counted again from its stored row
+            was = self.stored[pd.MultiIndex.from_frame(self.stored[GROUP].astype(str)).isin([key])]
+            if len(was):
+                self._drop([key])
+                self._fold(key, was[["count"] + SUMS].to_numpy(dtype=float).sum(axis=0))
+            self.redo.add(key)
+        self._fold(key, np.array([1.0] + [_num(row.get(c)) for c in SUMS]))
+
+    def _fold(self, key: tuple, vals: np.ndarray):
+        # A day's rows can span two chunks (the legacy tab and its first partition)
+        acc = self.live.get(key)
+        self.live[key] = vals if acc is None else acc + vals
+
+    def _frame(self, keys) -> pd.DataFrame:
+        rows = [list(k) + list(self.live[k]) for k in keys]
+        return typed("daily_summary", pd.DataFrame(rows, columns=GROUP + ["count"] + SUMS)[COLUMNS])
+
+    def take_finished(self, today: str):
+        """
+        Move days before `today` from live into stored. Returns the moved rows as
+        (new, replacing) frames, None where there are none.
+        """
+        keys = sorted(k for k in self.live if k[0] < today)
+        if not keys:
+            return None, None
+        done = self._frame(keys)
+        again = np.array([k in self.redo for k in keys], dtype=bool)
+        for k in keys:
+            del self.live[k]
+            self.redo.discard(k)
+        self.stored = concat_typed("daily_summary", [self.stored, done])
+        self.last = max(self.last, keys[-1][0])
+        return (done[~again] if not again.all() else None), (done[again] if again.any() else None)
+
+    def between(self, start: str, end: str) -> pd.DataFrame:
+        live = self._frame([k for k in self.live if start <= k[0] <= end])
+        d = self.stored["date"].astype(str)
+        stored = self.stored[(d >= start) & (d <= end)]
+        return concat_typed("daily_summary", [stored, live])
+
+_rollup = None
+_lock = threading.Lock()
+
+def _current() -> DailyRollup:
+    global _rollup
+    version = fresh_version("transactions")
+    with _lock:
+        if _rollup is not None and _rollup.version == version:
+            return _rollup
+    r = DailyRollup.build()
+    with _lock:
+        _rollup = r
+    return r
+
+def summary(start: str, end: str) -> pd.DataFrame:
+    """daily_summary rows for start..end (ISO dates, inclusive)."""
+    r = _current()
+    with _lock:
+        done, again = r.take_finished(today_str())
+        out = r.between(str(start), str(end))
+    # Outside the lock: append_rows notifies listeners, which take it
+    if done is not None:
+        append_rows("daily_summary", done.to_dict("records"))
+    if again is not None:
+        upsert_rows("daily_summary", again.to_dict("records"))
+    return out
+
+def daily_totals(start: str, end: str) -> pd.DataFrame:
+    """
+    One row per day with activity: count, fees, gas revenue and expected
+    closing balances (that day's opening plus its deltas). A day nobody opened
+    starts from the balances carried forward, as on the day screens.
+    """
+    from lib.ledger import DELTAS, OPENINGS, _carried  # lib.ledger imports this module
+    s = summary(start, end)
+    s = s.assign(gas_revenue=s["amount_value"].where(s["category"].astype(str) == "gas_sale", 0.0))
+    day = s.assign(date=s["date"].astype(str)).groupby("date")[
+        ["count", "fee", "gas_revenue"] + DELTAS].sum()
+    opens = read_df("daily_openings")
+    op = opens.assign(date=opens["date"].astype(str)).drop_duplicates("date").set_index("date")
+    closed = sorted(read_df("closing_counts")["date"].astype(str))
+    opened = sorted(op.index)
+    opening, anchored, prev = {}, set(), None
+    for d in day.index:
+        if d in op.index:
+            opening[d] = [_num(op.at[d, OPENINGS[c]]) for c in DELTAS]
+            anchored.add(d)
+        elif (prev in anchored and not _between(closed, prev, d)
+              and not _between(opened, shift_day(prev, 1), d)):
+            # No checkpoint since the previous active day, which had one: its expected
+            # close carries over, as _carried would find from that checkpoint
+            opening[d] = [o + day.at[prev, c] for o, c in zip(opening[prev], DELTAS)]
+            anchored.add(d)
+        else:
+            carried = _carried(d, opens)
+            opening[d] = [carried[1][c] for c in DELTAS] if carried else [0.0] * len(DELTAS)
+            if carried:
+                anchored.add(d)
+        prev = d
+    base = pd.DataFrame.from_dict(opening, orient="index", columns=DELTAS).reindex(day.index).fillna(0.0)
+    for bal, delta in (("cash", "cash_delta"), ("pos", "pos_delta"), ("transfer", "transfer_delta"), ("gas_kg", "gas_kg_delta")):
+        day[bal] = day[delta] + base[delta]
+    return day.drop(columns=DELTAS).reset_index()
+
+def _between(dates: list, lo: str, hi: str) -> bool:
+    """Whether sorted `dates` has one in lo..hi (hi excluded)."""
+    i = bisect.bisect_left(dates, lo)
+    return i < len(dates) and dates[i] < hi
+
+@on_append
+def _on_append(sheet_name, row, old, new):
+    # Fold an appended transaction into the live days instead of rebuilding
+    if sheet_name != "transactions":
+        return
+    with _lock:
+        if _rollup is not None and _rollup.version == (old,):
+            _rollup.add(row)
+            _rollup.version = (new,)
@@ -1,4 +1,7 @@
 # Central schema for all worksheets and their headers
+import hashlib
+import json
+import pandas as pd
 
 SHEETS = [
     "config_users",
@@ -10,6 +13,8 @@ SHEETS = [
     "daily_openings",
     "transactions",
     "closing_counts",
+    "daily_summary",
+    "sync_versions",
 ]
 
 HEADERS = {
@@ -27,5 +32,127 @@ HEADERS = {
         "cash_delta","pos_delta","transfer_delta","gas_kg_delta",
         "note","ref"
     ],
-    "closing_counts": ["date","cash_counted","gas_measured_kg","notes"]
-}
\ No newline at end of file
+    "closing_counts": [
+        "date","cash_counted","gas_measured_kg","notes",
+        # Frozen at close (lib.closing): what the ledger expected and the difference
+        "cash_expected","pos_expected","transfer_expected","gas_expected_kg",
+        "cash_variance","gas_variance_kg","tx_count","fees","gas_revenue","closed_by","closed_at"
+    ],
+    # Per-day aggregates of transactions, one row per date x category x methods (lib.rollup)
+    "daily_summary": [
+        "date","category","customer_method","provider_method","count",
+        "amount_value","fee","gas_kg","cash_delta","pos_delta","transfer_delta","gas_kg_delta"
+    ],
+}
+
+# Column (or tuple of columns) that uniquely identifies a row (used to de-duplicate replayed writes)
+KEYS = {
+    "config_prices": "key",
+    "daily_openings": "date",
+    "transactions": "id",
+    "closing_counts": "date",
+    "daily_summary": ("date", "category", "customer_method", "provider_method"),
+}
+
+def schema_fingerprint() -> str:
+    """Changes whenever a sheet or header is added, removed or renamed."""
+    blob = json.dumps([[s, HEADERS[s]] for s in SHEETS])
+    return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+# ---- Partitioned sheets ----
+# Rows of these sheets live in one worksheet per month, e.g. transactions_2026_10.
+# The unsuffixed worksheet holds history written before partitioning started.
+PARTITIONED = ("transactions",)
+
+# ---- Change tokens ----
+# sync_versions holds a single row: one token per non-partitioned sheet, replaced
+# whenever that sheet is written, so readers can tell whether it changed from
+# one tiny read (lib.sheets) instead of downloading it again
+VERSIONS = "sync_versions"
+HEADERS[VERSIONS] = [s for s in SHEETS if s not in PARTITIONED and s != VERSIONS]
+
+def partition_of(sheet_name: str, date: str) -> str:
+    return f"{sheet_name}_{str(date)[:4]}_{str(date)[5:7]}"
+
+def base_sheet(name: str) -> str:
+    for p in PARTITIONED:
+        if name.startswith(p + "_") and name[len(p) + 1:].replace("_", "").isdigit():
+            return p
+    return name
+
+def period_of(name: str) -> str:
+    """'transactions_2026_10' -> '2026-10'"""
+    return name[-7:].replace("_", "-")
+
+# ---- Column types, applied once when a sheet is loaded ----
+# Anything not listed is text. "day" is the ISO date string, kept categorical so
+# `df["date"] == "2026-10-17"` still works while costing one code per row.
+MONEY, KG, COUNT, CAT, DAY, DATETIME, TEXT = "money", "kg", "count", "category", "day", "datetime", "text"
+_TIERS = {"min_amount": MONEY, "max_amount": MONEY, "fee": MONEY}
+
+TYPES = {
+    "config_users": {"role": CAT},
+    "config_fees_withdrawal": _TIERS,
+    "config_fees_deposit": _TIERS,
+    "config_fees_bill": {"fee": MONEY},
+    "config_fees_charging": {"fee": MONEY},
+    "daily_openings": {"cash_open": MONEY, "pos_open": MONEY, "transfer_open": MONEY, "gas_open_kg": KG},
+    "transactions": {
+        "datetime": DATETIME, "date": DAY, "user": CAT, "role": CAT,
+        "category": CAT, "sub_type": CAT, "customer_method": CAT, "provider_method": CAT,
+        "amount_value": MONEY, "gas_kg": KG, "price_per_kg": MONEY, "fee": MONEY,
+        "total_paid_by_customer": MONEY,
+        "cash_delta": MONEY, "pos_delta": MONEY, "transfer_delta": MONEY, "gas_kg_delta": KG,
+    },
+    "closing_counts": {
+        "cash_counted": MONEY, "gas_measured_kg": KG,
+        "cash_expected": MONEY, "pos_expected": MONEY, "transfer_expected": MONEY, "gas_expected_kg": KG,
+        "cash_variance": MONEY, "gas_variance_kg": KG, "tx_count": COUNT, "fees": MONEY, "gas_revenue": MONEY,
+        "closed_at": DATETIME,
+    },
+    "daily_summary": {
+        "date": DAY, "category": CAT, "customer_method": CAT, "provider_method": CAT, "count": COUNT,
+        "amount_value": MONEY, "fee": MONEY, "gas_kg": KG,
+        "cash_delta": MONEY, "pos_delta": MONEY, "transfer_delta": MONEY, "gas_kg_delta": KG,
+    },
+}
+
+def _text(s):
+    return s.fillna("").astype(str)
+
+def _cast(s, kind):
+    if kind in (MONEY, KG):
+        return pd.to_numeric(s, errors="coerce").fillna(0.0).astype("float64")
+    if kind == COUNT:
+        return pd.to_numeric(s, errors="coerce").fillna(0).astype("int64")
+    if kind == DATETIME:
+        # Stored as ISO strings with the Lagos offset
+        return pd.to_datetime(s, errors="coerce", utc=True, format="ISO8601").dt.tz_convert("Africa/Lagos")
+    if kind in (CAT, DAY):
+        return _text(s).astype("category")
+    return _text(s)
+
+def typed(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Parse raw cell values into the sheet's column types."""
+    types = TYPES.get(base_sheet(sheet_name), {})
+    return pd.DataFrame({c: _cast(df[c], types.get(c, TEXT)) for c in df.columns}, index=df.index)
+
+def concat_typed(sheet_name: str, frames: list) -> pd.DataFrame:
+    # Categoricals with different categories concat to object; re-encode those
+    df = pd.concat(frames, ignore_index=True)
+    types = TYPES.get(base_sheet(sheet_name), {})
+    for c in df.columns:
+        if types.get(c) in (CAT, DAY) and df[c].dtype != "category":
+            df[c] = df[c].astype("category")
+    return df
+
+def to_cell(x):
+    """A frame value as something Sheets / sqlite3 accept."""
+    if x is None or (not isinstance(x, str) and pd.isna(x)):
+        return ""
+    if isinstance(x, pd.Timestamp):
+        return x.isoformat()
+    return x.item() if hasattr(x, "item") else x
+
+def to_cells(df: pd.DataFrame) -> list:
+    return [[to_cell(x) for x in row] for row in df.itertuples(index=False)]
@@ -1,10 +1,24 @@
 # lib/sheets.py
+import logging
+import re
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import gspread
 import pandas as pd
 import streamlit as st
-from gspread.exceptions import APIError
-from lib.schema import SHEETS, HEADERS
+from lib.schema import SHEETS, HEADERS, KEYS, PARTITIONED, VERSIONS, schema_fingerprint, typed, concat_typed, to_cell, to_cells, base_sheet, partition_of, period_of
+from lib.journal import get_journal
+from lib import diskcache
+from lib.dayindex import DayIndex
+from lib.backend import Backend, secret, key_of, first_rows
+from lib.governor import get_governor
+from lib.metrics import get_metrics, timed, count_response_bytes
+
+# Cached frames are shared by every session; with copy-on-write a shallow copy
+# is all a caller needs to edit one safely (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # ---------- Helpers ----------
 def _col_letters(n: int) -> str:
@@ -15,146 +29,1077 @@ def _col_letters(n: int) -> str:
         s = chr(65 + r) + s
     return s
 
-def _ranges_for_all_sheets(max_rows: int = 20000) -> dict:
-    """Return a mapping: sheet_name -> A1 range like 'Sheet!A1:AG20000'."""
+def _headers(name: str) -> list:
+    # Partition worksheets share the headers of their logical sheet
+    return HEADERS[base_sheet(name)]
+
+def _key(name: str):
+    return KEYS.get(base_sheet(name))
+
+def _key_cols(name: str) -> list:
+    key = _key(name)
+    return [] if key is None else [key] if isinstance(key, str) else list(key)
+
+def _row_keys(df: pd.DataFrame, cols: list):
+    # Comparable keys of a frame's rows, composite ones as a MultiIndex
+    return df[cols[0]] if len(cols) == 1 else pd.MultiIndex.from_frame(df[cols].astype(str))
+
+def _ranges_for_all_sheets(max_rows: int = None, sheets=None) -> dict:
+    """Return a mapping: sheet_name -> A1 range like 'Sheet!A1:AG' (every row unless max_rows)."""
     ranges = {}
-    for s in SHEETS:
+    for s in (sheets or SHEETS):
         last_col = _col_letters(max(1, len(HEADERS[s])))
-        ranges[s] = f"{s}!A1:{last_col}{max_rows}"
+        ranges[s] = f"{s}!A1:{last_col}{max_rows or ''}"
     return ranges
 
 # ---------- Client singletons ----------
 @st.cache_resource
 def _client_from_secrets():
-    return gspread.service_account_from_dict(dict(st.secrets["gcp_service_account"]))
+    gc = gspread.service_account_from_dict(dict(st.secrets["gcp_service_account"]))
+    # gspread 6 keeps the requests session on its HTTPClient (see requirements.txt)
+    gc.http_client.session.hooks["response"].append(count_response_bytes)
+    return gc
 
 def get_client():
     return _client_from_secrets()
 
 def _with_retry(fn, *args, **kwargs):
-    # Backoff with jitter for 429/500/503
-    for i in range(5):
-        try:
-            return fn(*args, **kwargs)
-        except APIError as e:
-            code = getattr(getattr(e, "response", None), "status_code", None)
-            if code in (429, 500, 503):
-                time.sleep((i + 1) * 1.2)  # 1.2s, 2.4s, 3.6s, ...
-                continue
-            raise
-    return fn(*args, **kwargs)
+    # Rate limiting, backoff for 429/500/503 and read coalescing live in lib.governor
+    with timed("sheets", getattr(fn, "__name__", "?")):
+        return get_governor().call(fn, *args, **kwargs)
+
+# ---------- Concurrent I/O ----------
+# Independent per-sheet requests run side by side, so a round of them costs
+# about one round trip; every request still goes through the governor
+IO_WORKERS = 8
+
+@st.cache_resource
+def _io_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=int(secret("SHEETS_IO_WORKERS", IO_WORKERS)),
+                              thread_name_prefix="sheets-io")
+
+def _parallel(fn, items) -> list:
+    """[fn(x) for x in items], concurrently; results in order, the first error is raised."""
+    items = list(items)
+    # Nested calls run inline: a worker waiting on the pool it occupies could deadlock
+    if len(items) < 2 or threading.current_thread().name.startswith("sheets-io"):
+        return [fn(x) for x in items]
+    return list(_io_pool().map(fn, items))
+
+# ---------- Handle pool ----------
+# open_by_key and worksheet() each cost a metadata fetch; handles are only
+# ids and titles, so one per spreadsheet / worksheet is kept for the process
+class _Handles:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spreads = {}     # SHEET_ID -> Spreadsheet
+        self.worksheets = {}  # (SHEET_ID, title) -> Worksheet
+
+@st.cache_resource
+def _handle_pool() -> _Handles:
+    return _Handles()
 
 def get_spreadsheet(gc):
     sheet_id = st.secrets["SHEET_ID"]
-    return _with_retry(gc.open_by_key, sheet_id)
+    pool = _handle_pool()
+    with pool.lock:
+        spread = pool.spreads.get(sheet_id)
+    if spread is None:
+        spread = _with_retry(gc.open_by_key, sheet_id)
+        with pool.lock:
+            spread = pool.spreads.setdefault(sheet_id, spread)
+    return spread
+
+def _remember_worksheets(spread, props: list):
+    """Pool handles from sheet properties already fetched (or just created)."""
+    _pool_worksheets(spread, [gspread.Worksheet(spread, p, spread.id, spread.client) for p in props])
+
+def _pool_worksheets(spread, handles: list):
+    pool = _handle_pool()
+    with pool.lock:
+        for ws in handles:
+            pool.worksheets[(spread.id, ws.title)] = ws
+
+def get_worksheet(spread, title: str):
+    pool = _handle_pool()
+    with pool.lock:
+        ws = pool.worksheets.get((spread.id, title))
+    if ws is None:
+        # One metadata fetch re-pools every worksheet, not just this one
+        meta = _with_retry(spread.fetch_sheet_metadata, params={"fields": "sheets.properties"})
+        _remember_worksheets(spread, [sh["properties"] for sh in meta.get("sheets", [])])
+        with pool.lock:
+            ws = pool.worksheets.get((spread.id, title))
+        if ws is None:
+            raise gspread.WorksheetNotFound(title)
+    return ws
+
+def invalidate_handles(title: str = None):
+    """
+    Forget pooled worksheet handles (all of them, or one title) after a sheet
+    was deleted, renamed or recreated; the schema check also runs again.
+    """
+    pool = _handle_pool()
+    with pool.lock:
+        for k in [k for k in pool.worksheets if title is None or k[1] == title]:
+            del pool.worksheets[k]
+    _bootstrapped.clear()
+
+# How Sheets words a 400 for a tab title or sheetId that no longer exists; other
+# 400s (e.g. a range past the grid) say nothing about the worksheet being gone
+_GONE = ("Unable to parse range", "No grid with id")
+
+def _missing_sheet(e: Exception) -> bool:
+    return isinstance(e, gspread.WorksheetNotFound) or (
+        isinstance(e, gspread.exceptions.APIError)
+        and e.code == 400 and any(m in str(e.error.get("message", "")) for m in _GONE)
+    )
 
 def ensure_sheet(spread, title, headers):
     try:
-        ws = spread.worksheet(title)
+        ws = get_worksheet(spread, title)
     except gspread.WorksheetNotFound:
         ws = _with_retry(spread.add_worksheet, title=title, rows=1000, cols=max(5, len(headers)))
         _with_retry(ws.append_row, headers)
+        _pool_worksheets(spread, [ws])
         return ws
-    if ws.row_values(1) != headers:
+    if _with_retry(ws.row_values, 1) != headers:
         _with_retry(ws.update, '1:1', [headers])
     return ws
 
+def _header_cells(sheet_id: int, headers: list) -> dict:
+    return {"updateCells": {
+        "range": {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": 1,
+                  "startColumnIndex": 0, "endColumnIndex": len(headers)},
+        "rows": [{"values": [{"userEnteredValue": {"stringValue": h}} for h in headers]}],
+        "fields": "userEnteredValue",
+    }}
+
 def ensure_all_sheets(gc):
+    """
+    Check every sheet with one metadata fetch and one batched header read;
+    missing sheets, short grids and wrong headers are fixed in one batch_update.
+    """
     spread = get_spreadsheet(gc)
-    for s in SHEETS:
-        ensure_sheet(spread, s, HEADERS[s])
+    meta = _with_retry(spread.fetch_sheet_metadata,
+                       params={"fields": "sheets.properties(sheetId,title,gridProperties.columnCount)"})
+    props = {sh["properties"]["title"]: sh["properties"] for sh in meta.get("sheets", [])}
+    _remember_partitions(props)
+    targets = SHEETS + [t for t in props if base_sheet(t) != t]
+    present = [t for t in targets if t in props]
+    current = {}
+    if present:
+        ranges = [f"{t}!A1:{_col_letters(len(_headers(t)))}1" for t in present]
+        try:
+            resp = _with_retry(spread.values_batch_get, ranges)
+            values = [vr.get("values") for vr in resp.get("valueRanges", [])]
+        except Exception:
+            values = _parallel(lambda r: _with_retry(spread.values_get, r).get("values"), ranges)
+        for t, v in zip(present, values):
+            current[t] = (v or [[]])[0]
+    requests = []
+    next_id = max([p["sheetId"] for p in props.values()], default=0) + 1
+    for t in targets:
+        hdrs = _headers(t)
+        if t not in props:
+            requests.append({"addSheet": {"properties": {
+                "sheetId": next_id, "title": t,
+                "gridProperties": {"rowCount": 1000, "columnCount": max(5, len(hdrs))},
+            }}})
+            requests.append(_header_cells(next_id, hdrs))
+            props[t] = {"sheetId": next_id, "title": t}
+            next_id += 1
+            continue
+        if current.get(t) == hdrs:
+            continue
+        sid = props[t]["sheetId"]
+        cols = props[t].get("gridProperties", {}).get("columnCount", 0)
+        if cols < len(hdrs):
+            requests.append({"appendDimension": {"sheetId": sid, "dimension": "COLUMNS", "length": len(hdrs) - cols}})
+        requests.append(_header_cells(sid, hdrs))
+    if requests:
+        _with_retry(spread.batch_update, {"requests": requests})
+    _remember_worksheets(spread, list(props.values()))
+
+@st.cache_resource(show_spinner=False)
+def _bootstrapped(fingerprint: str) -> bool:
+    # Runs once per process and schema version; a failure is not cached, so the next rerun retries
+    ensure_all_sheets(get_client())
+    return True
+
+# ---------- Data versions ----------
+# Bumped whenever what read_df returns for a sheet may have changed, so derived
+# state (lib.ledger) can tell whether it is still current
+_versions = {s: 0 for s in SHEETS}
+_append_listeners = []
+_version_lock = threading.RLock()
+
+def _bump(sheet_name: str):
+    with _version_lock:
+        _versions[sheet_name] += 1
+
+def data_version(*sheet_names) -> tuple:
+    return tuple(_versions[s] for s in sheet_names)
 
-# ---------- ONE batched read for everything ----------
-@st.cache_data(ttl=300, show_spinner=False)  # 5 minutes on Cloud
-def _batch_read_all() -> dict:
+def fresh_version(*sheet_names) -> tuple:
     """
-    Returns {sheet_name: DataFrame} for every sheet, using one batchGet.
-    Falls back to per-sheet reads if batchGet is unavailable.
+    data_version after revalidating cached sheets that are due, so memoized
+    state checked against it also notices writes made elsewhere.
     """
-    gc = get_client()
-    spread = get_spreadsheet(gc)
+    get_backend().revalidate(sheet_names)
+    return data_version(*sheet_names)
+
+def on_append(fn):
+    """Register fn(sheet_name, row, old_version, new_version), called after every append_row."""
+    _append_listeners.append(fn)
+    return fn
+
+# ---------- Per-sheet read cache ----------
+# Append-only sheets are read incrementally by tail; the rest are batched together
+TAIL_SHEETS = ("transactions",)
+READ_TTL = 300       # partition list refresh
+PROBE_INTERVAL = 15  # seconds a cached frame is trusted before it is revalidated
+MAX_AGE = 300        # full re-read regardless (tail sheets: in the background); catches edits made by hand
+_refresh_lock = threading.Lock()
+
+def _pad(rows: list, width: int) -> list:
+    # Sheets trims trailing empty cells, so rows come back ragged
+    return [(r + [""] * (width - len(r)))[:width] for r in rows]
 
-    # Try batch values API (1 request for many ranges)
+# Numbers arrive as numbers; dates keep the text they were entered as
+_RENDER = {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "FORMATTED_STRING"}
+
+def _frame(sheet_name: str, values: list) -> pd.DataFrame:
+    # Convert rows to a typed DataFrame using our HEADERS, dropping the header row if present
+    hdrs = _headers(sheet_name)
+    rows = values[1:] if values and values[0] == hdrs else values
+    return typed(sheet_name, pd.DataFrame(_pad(rows, len(hdrs)), columns=hdrs))
+
+class _Entry:
+    """
+    Cached frame of one sheet. For tail sheets `rows` is the number of data
+    rows seen and `last` the key of the last one (the key header when empty).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.df = None
+        self.rows = 0
+        self.last = None
+        self.fetched = 0.0
+        self.checked = 0.0  # last fetch or successful revalidation
+        self.full = 0.0     # last full read; tail sheets are re-read in full every MAX_AGE
+        self.token = ""     # sync_versions token the frame corresponds to
+        self.stale = True
+        self.generation = 0  # bumped per load; lets the snapshot saver skip unchanged frames
+        self.saved = (0, 0.0)  # generation and time of the last on-disk snapshot
+        self.days = None  # DayIndex of df, built on the first by-date read
+        self.through = 0  # journal seq up to which this process's queued rows are in df
+
+    def view(self, date: str = None):
+        """
+        (frame, through) as of one moment; `date` gives just that day's rows,
+        through the day index (no scan).
+        """
+        with self.lock:
+            df, through = self.df, self.through
+            if date is None:
+                return df.copy(deep=False), through
+            if self.days is None:
+                self.days = DayIndex(_dates(df))
+            rows = self.days.rows(date)
+        return (df.iloc[rows] if isinstance(rows, slice) else df.take(rows)), through
+
+    def fresh(self) -> bool:
+        now = time.time()
+        return (self.df is not None and not self.stale
+                and now - self.checked < PROBE_INTERVAL and now - self.fetched < MAX_AGE)
+
+    def load(self, sheet_name: str, df: pd.DataFrame, changed: bool = True, appended: bool = False,
+             through: int = None):
+        """
+        `appended`: df is the current frame plus rows at the end, so the day index
+        is extended. `through`: every row queued up to that seq is in df.
+        """
+        # A first load changes nothing anyone derived: only closed months, which
+        # never change, are read around the cache (see iter_range)
+        if changed and self.df is not None:
+            _bump(base_sheet(sheet_name))
+        if not (appended and self.days is not None and self.days.extend(_dates(df.iloc[self.rows:]))):
+            self.days = None
+        self.df = df
+        if through is not None:
+            self.through = max(self.through, through)
+        self.rows = len(df)
+        if _is_tail(sheet_name):
+            key = _key(sheet_name)
+            self.last = str(df[key].iloc[-1]) if len(df) else key
+        self.fetched = self.checked = time.time()
+        if not appended:
+            self.full = self.fetched
+        self.stale = False
+        self.generation += 1
+
+def _dates(df: pd.DataFrame):
+    return df["date"].astype(str).to_numpy()
+
+# sheet -> highest journal seq whose row Sheets has accepted. Taken before a read,
+# it says which queued rows the frame read is sure to hold (see _with_pending)
+_shipped = {}
+
+@st.cache_resource
+def _sheet_cache() -> dict:
+    return {s: _Entry() for s in SHEETS}
+
+def _entry(name: str) -> _Entry:
+    # Partition worksheets get their entry on first use
+    return _sheet_cache().setdefault(name, _Entry())
+
+def _is_tail(name: str) -> bool:
+    return base_sheet(name) in TAIL_SHEETS
+
+def _refresh_batched(spread, names: list):
+    """
+    One batchGet for every listed sheet, plus sync_versions so each frame is
+    stamped with the token it was read at. Falls back to concurrent per-sheet
+    reads if batchGet is unavailable.
+    """
+    cache = _sheet_cache()
+    names = [s for s in names if s != VERSIONS] + [VERSIONS]
+    ranges = _ranges_for_all_sheets(sheets=names)
+    shipped = {s: _shipped.get(s, 0) for s in names}
+    def load(s, rows):
+        with cache[s].lock:
+            cache[s].load(s, _frame(s, rows), through=shipped[s])
     try:
-        ranges = list(_ranges_for_all_sheets().values())
-        resp = _with_retry(spread.values_batch_get, ranges)  # gspread wrapper
+        resp = _with_retry(spread.values_batch_get, list(ranges.values()), params=_RENDER)  # gspread wrapper
         value_ranges = resp.get("valueRanges", [])
-        name_by_range = {v: k for k, v in _ranges_for_all_sheets().items()}
-        out = {}
-        for vr in value_ranges:
-            rng = vr.get("range")
-            values = vr.get("values", [])
-            sheet_name = name_by_range.get(rng.split('!')[0] + '!' + rng.split('!')[1], None)
-            # More robust: parse sheet name from "range"
-            if sheet_name is None:
-                sheet_name = vr["range"].split('!')[0]
-            # Convert rows to DataFrame using our HEADERS
-            hdrs = HEADERS.get(sheet_name, [])
-            if values:
-                # Align to headers, drop the header row if present
-                if values[0] == hdrs:
-                    rows = values[1:]
-                else:
-                    rows = values
-                df = pd.DataFrame(rows, columns=hdrs[:len(rows[0])] if rows else hdrs)
-            else:
-                df = pd.DataFrame(columns=hdrs)
-            out[sheet_name] = df
-        # Ensure all sheets present
-        for s in SHEETS:
-            out.setdefault(s, pd.DataFrame(columns=HEADERS[s]))
-        return out
+        # Responses come back in request order
+        for s, vr in zip(names, value_ranges):
+            load(s, vr.get("values", []))
     except Exception:
-        # Fallback: read one by one (still cached)
-        out = {}
-        for s in SHEETS:
-            ws = spread.worksheet(s)
-            rows = _with_retry(ws.get_all_values)
-            hdrs = HEADERS[s]
-            if rows:
-                if rows[0] == hdrs:
-                    data = rows[1:]
+        def fetch(s):
+            ws = get_worksheet(spread, s)
+            return _with_retry(ws.get_all_values, value_render_option=_RENDER["valueRenderOption"],
+                               date_time_render_option=_RENDER["dateTimeRenderOption"])
+        for s, rows in zip(names, _parallel(fetch, names)):
+            load(s, rows)
+    tokens = _tokens(cache[VERSIONS].df)
+    for s in names:
+        cache[s].token = tokens.get(s, "")
+
+def _tokens(df: pd.DataFrame) -> dict:
+    return df.iloc[0].to_dict() if len(df) else {}
+
+def _revalidate(spread):
+    """
+    One read of the sync_versions row, returned as {sheet: token}. Cached frames
+    whose token did not move are trusted for another PROBE_INTERVAL; the others
+    are marked stale.
+    """
+    last_col = _col_letters(len(_headers(VERSIONS)))
+    resp = _with_retry(spread.values_get, f"{VERSIONS}!A1:{last_col}2", params=_RENDER)
+    tokens = _tokens(_frame(VERSIONS, resp.get("values", [])))
+    now = time.time()
+    for s in _headers(VERSIONS):
+        e = _entry(s)
+        if e.df is None:
+            continue
+        if tokens.get(s, "") == e.token:
+            e.checked = now
+        else:
+            e.stale = True
+    return tokens
+
+# Writers replace the token after (or together with) the data, never before, so a
+# reader can fetch new data with an old token but never old data with a new one
+def _versioned(sheet_name: str) -> bool:
+    return sheet_name in _headers(VERSIONS)
+
+def _new_token() -> str:
+    return f"v{time.time_ns():x}"  # never parses as a number
+
+def _token_range(sheet_name: str) -> str:
+    return f"{VERSIONS}!{_col_letters(_headers(VERSIONS).index(sheet_name) + 1)}2"
+
+def _token_cell(spread, sheet_name: str, token: str) -> dict:
+    """batch_update request setting the token, to ride along with a data write."""
+    col = _headers(VERSIONS).index(sheet_name)
+    return {"updateCells": {
+        "range": {"sheetId": get_worksheet(spread, VERSIONS).id, "startRowIndex": 1, "endRowIndex": 2,
+                  "startColumnIndex": col, "endColumnIndex": col + 1},
+        "rows": [{"values": [{"userEnteredValue": {"stringValue": token}}]}],
+        "fields": "userEnteredValue",
+    }}
+
+def _adopt(sheet_name: str, prior: str, token: str):
+    """
+    After our own write replaced token `prior` with `token`: the cached frame
+    only follows along if it was current before the write. Otherwise somebody
+    else wrote in between and it is re-read instead.
+    """
+    e = _entry(sheet_name)
+    if e.token == prior:
+        e.token = token
+    else:
+        e.stale = True
+
+def _touch(spread, sheet_name: str, prior: str):
+    """New token for a sheet whose data was just written by a separate call."""
+    token = _new_token()
+    _with_retry(spread.values_update, _token_range(sheet_name),
+                params={"valueInputOption": "RAW"}, body={"values": [[token]]})
+    _adopt(sheet_name, prior, token)
+
+def _read_batched(sheet_name: str) -> pd.DataFrame:
+    cache = _sheet_cache()
+    with _refresh_lock:
+        e = cache[sheet_name]
+        if not e.fresh():
+            spread = get_spreadsheet(get_client())
+            if e.df is not None and not e.stale:
+                _revalidate(spread)  # usually nothing moved and this is all it costs
+            if not e.fresh():
+                # Pay for one round trip, so refresh every expired small sheet with it
+                names = [s for s in SHEETS if s not in TAIL_SHEETS and not cache[s].fresh()]
+                _refresh_batched(spread, names)
+    return e.df
+
+def _read_tail(sheet_name: str) -> pd.DataFrame:
+    """
+    Fetch only rows from the last one already seen onwards (`Sheet!A{n}:T`),
+    together with the header. If the header or the key of that first row
+    changed (rows deleted or headers moved) fall back to one full re-read.
+    """
+    e = _entry(sheet_name)
+    with e.lock:
+        if e.fresh() or (e.df is not None and not e.stale and _closed(sheet_name)):
+            return e.df  # closed months are not written any more; only clear_cache re-reads them
+        if e.df is None:
+            _restore(sheet_name, e)  # a restart resumes from disk; the tail check below reconciles it
+        spread = get_spreadsheet(get_client())
+        hdrs = _headers(sheet_name)
+        last_col = _col_letters(len(hdrs))
+        key_idx = hdrs.index(_key(sheet_name))
+        shipped = _shipped.get(sheet_name, 0)
+        if e.df is not None:
+            # Starting at the last row seen (the header when empty) never asks past
+            # the grid, which Sheets refuses for a tab that is exactly full
+            n = e.rows + 1
+            try:
+                resp = _with_retry(spread.values_batch_get, [
+                    f"{sheet_name}!A1:{last_col}1",
+                    f"{sheet_name}!A{n}:{last_col}",
+                ], params=_RENDER)
+            except gspread.exceptions.APIError as err:
+                if err.code != 400 or _missing_sheet(err):
+                    raise
+                # Past the grid after all: rows were deleted, so the full read below applies
+                resp = {"valueRanges": [{}, {}]}
+            header, rows = [vr.get("values", []) for vr in resp.get("valueRanges", [])]
+            last_key = str(_pad(rows[:1], len(hdrs))[0][key_idx]) if rows else None
+            tail = rows[1:]
+            if header[:1] == [hdrs] and last_key == e.last:
+                if tail:
+                    e.load(sheet_name, concat_typed(sheet_name, [e.df, _frame(sheet_name, tail)]),
+                           appended=True, through=shipped)
+                else:
+                    e.load(sheet_name, e.df, changed=False, appended=True, through=shipped)
+                if time.time() - e.full >= MAX_AGE:
+                    # The tail check only sees new rows; edits and deletions among the ones
+                    # already held need a full read, done off the request path
+                    e.full = time.time()
+                    threading.Thread(target=_reread, args=(sheet_name,), name=f"reread-{sheet_name}",
+                                     daemon=True).start()
+                return e.df
+        e.load(sheet_name, _read_full(spread, sheet_name), through=shipped)
+        return e.df
+
+def _read_full(spread, sheet_name: str) -> pd.DataFrame:
+    last_col = _col_letters(len(_headers(sheet_name)))
+    resp = _with_retry(spread.values_get, f"{sheet_name}!A1:{last_col}", params=_RENDER)
+    return _frame(sheet_name, resp.get("values", []))
+
+def _apply_append(sheet_name: str, values: list, updated_range: str, through: int):
+    """Write-through: add rows Sheets just accepted (queued up to seq `through`) to the cached frame."""
+    e = _entry(sheet_name)
+    with e.lock:
+        if e.df is None:
+            return
+        # 'transactions!A7:T8' -> first row 7; only safe if nobody else appended
+        first = int("".join(ch for ch in updated_range.split("!")[-1].split(":")[0] if ch.isdigit()) or 0)
+        if first != e.rows + 2:
+            e.stale = True
+            return
+        df = concat_typed(sheet_name, [e.df, _frame(sheet_name, values)])
+        fetched, checked = e.fetched, e.checked
+        e.load(sheet_name, df, changed=False, appended=True, through=through)  # already visible from the journal
+        e.fetched, e.checked = fetched, checked  # write-through is not a revalidation
+
+# ---------- On-disk snapshots ----------
+# Tail sheets are the ones whose full read grows with history, so their last good
+# read is kept on disk and a new process only fetches what was added since
+SNAPSHOT_INTERVAL = 60.0  # seconds between re-saves of a changed sheet
+
+def _snapshot_tag() -> dict:
+    return {"sheet_id": str(secret("SHEET_ID", "")), "fingerprint": schema_fingerprint()}
+
+def _restore(sheet_name: str, e: _Entry):
+    df = diskcache.load(sheet_name, _snapshot_tag())
+    if df is not None:
+        e.load(sheet_name, df)
+        e.saved = (e.generation, time.time())
+        e.stale = True
+        e.full = 0.0  # saved at some point: the tail check that follows also starts a full read
+
+def _reread(sheet_name: str):
+    """Full read of a tail sheet; replaces the frame if a row it already had differs."""
+    e = _entry(sheet_name)
+    shipped = _shipped.get(sheet_name, 0)
+    try:
+        full = _read_full(get_spreadsheet(get_client()), sheet_name)
+    except Exception as err:
+        _failed("reread", err)
+        return
+    _errors.pop("reread", None)
+    with e.lock:
+        n = min(len(e.df), len(full))
+        # Only the rows both have: rows past them are new, which the tail reads fetch
+        same = (pd.util.hash_pandas_object(e.df.iloc[:n], index=False).to_numpy()
+                == pd.util.hash_pandas_object(full.iloc[:n], index=False).to_numpy())
+        if not same.all():
+            e.load(sheet_name, full, through=shipped)
+            e.stale = True  # rows written through since the read are fetched again by tail
+
+def save_snapshots(force: bool = False) -> int:
+    """Write tail sheets whose cached frame changed since their last snapshot; returns how many."""
+    n = 0
+    for name, e in list(_sheet_cache().items()):
+        if not _is_tail(name):
+            continue
+        with e.lock:
+            df, gen = e.df, e.generation
+            due = force or time.time() - e.saved[1] >= SNAPSHOT_INTERVAL
+        if df is None or gen == e.saved[0] or not due:
+            continue
+        diskcache.save(name, df, _snapshot_tag())  # outside the lock: readers are not held up
+        with e.lock:
+            e.saved = (gen, time.time())
+        n += 1
+    return n
+
+def clear_cache(sheet_name: str = None):
+    cache = _sheet_cache()
+    for s in ([sheet_name] if sheet_name else list(cache)):
+        _entry(s).stale = True  # tail sheets only refetch what is new
+
+# ---------- Transaction partitions ----------
+class _Partitions:
+    """Titles of the monthly partition worksheets, from spreadsheet metadata."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = set()
+        self.fetched = 0.0
+
+@st.cache_resource
+def _partition_index() -> _Partitions:
+    return _Partitions()
+
+def _remember_partitions(props: dict):
+    p = _partition_index()
+    with p.lock:
+        p.names = {t for t in props if base_sheet(t) != t}
+        p.fetched = time.time()
+
+def partition_names(spread=None) -> list:
+    p = _partition_index()
+    with p.lock:
+        if time.time() - p.fetched >= READ_TTL:
+            spread = spread or get_spreadsheet(get_client())
+            meta = _with_retry(spread.fetch_sheet_metadata, params={"fields": "sheets.properties.title"})
+            titles = [sh["properties"]["title"] for sh in meta.get("sheets", [])]
+            p.names = {t for t in titles if base_sheet(t) != t}
+            p.fetched = time.time()
+        return sorted(p.names)
+
+def _ensure_partition(spread, name: str):
+    # Rollover: the first row of a new month creates that month's worksheet
+    if base_sheet(name) == name or name in partition_names(spread):
+        return
+    ensure_sheet(spread, name, _headers(name))
+    p = _partition_index()
+    with p.lock:
+        p.names.add(name)
+
+def _next_month(period: str) -> str:
+    y, m = int(period[:4]), int(period[5:7])
+    return f"{y + m // 12:04d}-{m % 12 + 1:02d}"
+
+def partitions_for(sheet_name: str, start: str = None, end: str = None) -> list:
+    """
+    Worksheets holding rows of `sheet_name` dated start..end (inclusive, None = open).
+    The pre-partitioning worksheet is only needed up to the month partitioning began.
+    """
+    known = partition_names()
+    # Months whose first rows are still queued have no worksheet yet
+    queued = [n for n in get_journal().sheets() if n not in known]
+    parts = sorted(n for n in known + queued if base_sheet(n) == sheet_name)
+    out = []
+    if not parts or start is None or str(start) < _next_month(period_of(parts[0])) + "-01":
+        out.append(sheet_name)
+    for n in parts:
+        if (start is None or period_of(n) >= str(start)[:7]) and (end is None or period_of(n) <= str(end)[:7]):
+            out.append(n)
+    return out
+
+def _live_partitions(sheet_name: str) -> set:
+    """Worksheets that today's rows go to or are read from; the rest are closed months."""
+    from lib.utils import today_str, shift_day  # lib.utils imports lib.config, which imports this module
+    today = today_str()
+    # Yesterday too: rows queued just before midnight on the 1st still land in last month
+    return set(partitions_for(sheet_name, shift_day(today, -1), today))
+
+def live_since() -> str:
+    """First day whose rows go to a live worksheet; older rows are in closed months."""
+    from lib.utils import today_str, shift_day
+    return shift_day(today_str(), -1)[:8] + "01"
+
+def _closed(name: str) -> bool:
+    base = base_sheet(name)
+    return base in PARTITIONED and name not in _live_partitions(base)
+
+# ---------- Write-behind journal flushing ----------
+FLUSH_INTERVAL = 2.0   # seconds between background drains
+FLUSH_BATCH = 500      # rows per values.append call
+PARK_AFTER = 3         # refusals of the same row (a 4xx other than 429) before it is set aside
+_flush_lock = threading.Lock()
+
+# Appended by whichever process gets there first (lib.rollup), so every batch is
+# checked by key, not only the ones a crash may have sent already
+SHARED_APPENDS = ("daily_summary",)
+
+def _sheet_keys(spread, sheet_name) -> set:
+    idx = [_headers(sheet_name).index(c) for c in _key_cols(sheet_name)]
+    lo, hi = min(idx), max(idx)
+    resp = _with_retry(spread.values_get, f"{sheet_name}!{_col_letters(lo + 1)}2:{_col_letters(hi + 1)}")
+    rows = _pad([r for r in resp.get("values", []) if r], hi - lo + 1)
+    return {tuple(str(r[i - lo]) for i in idx) for r in rows}
+
+def flush_pending(spread, journal, sheet_name=None) -> int:
+    """
+    Drain queued rows to Sheets, oldest first, one values.append per batch.
+    Rows are only removed from the journal after Sheets accepted them; rows that
+    were in flight when the process died (and every SHARED_APPENDS row) are
+    checked by key before being sent.
+    """
+    sent = 0
+    with _flush_lock:
+        while True:
+            name, items = journal.next_batch(FLUSH_BATCH, sheet_name)
+            if not items:
+                return sent
+            if items[0][0] in _strikes:
+                items = items[:1]  # a refused batch is retried row by row, so only the bad row is parked
+            seqs = [seq for seq, _ in items]
+            _ensure_partition(spread, name)
+            shared = base_sheet(name) in SHARED_APPENDS
+            if _key(name) and (shared or journal.unconfirmed.intersection(seqs)):
+                existing = _sheet_keys(spread, name)
+                idx = [_headers(name).index(c) for c in _key_cols(name)]
+                dup = [seq for seq, v in items if (shared or seq in journal.unconfirmed)
+                       and tuple(str(v[i]) for i in idx) in existing]
+                journal.verified(seqs)
+                if dup:
+                    journal.ack(name, dup)
+                    continue
+            # The token this append replaces, read before it, so _touch can tell
+            # whether the cached frame was current
+            prior = _revalidate(spread).get(name, "") if _versioned(name) else ""
+            journal.mark_sent(seqs)
+            values = [v for _, v in items]
+            try:
+                resp = _with_retry(
+                    spread.values_append,
+                    f"{name}!A1",
+                    params={"valueInputOption": "USER_ENTERED", "insertDataOption": "INSERT_ROWS"},
+                    body={"values": values},
+                )
+            except gspread.exceptions.APIError as err:
+                if _rejected(err) and _strike(seqs[0]) >= PARK_AFTER:
+                    journal.park(name, seqs, str(err))  # the rows behind this batch go on syncing
+                    _failed("park", err)
+                    continue
+                raise
+            _strikes.pop(seqs[0], None)
+            _shipped[name] = seqs[-1]  # batches are a sheet's oldest rows, so every seq before is in
+            _apply_append(name, values, resp.get("updates", {}).get("updatedRange", ""), seqs[-1])
+            journal.ack(name, seqs)
+            if _versioned(name):
+                _touch(spread, name, prior)
+            sent += len(seqs)
+
+_strikes = {}  # first seq of a batch Sheets refused -> refusals so far
+
+def _rejected(e: Exception) -> bool:
+    # Refused for what was sent, not for load or a missing tab: retrying will not help
+    code = getattr(e, "code", None)
+    return isinstance(code, int) and 400 <= code < 500 and code != 429 and not _missing_sheet(e)
+
+def _strike(seq: int) -> int:
+    _strikes[seq] = _strikes.get(seq, 0) + 1
+    return _strikes[seq]
+
+# ---------- Background errors ----------
+log = logging.getLogger(__name__)
+_errors = {}  # what failed ("flush", "revalidate", ...) -> (time, message); the last one is shown
+
+def _failed(what: str, e: Exception):
+    get_metrics().record("sync", what, status="error")
+    log.warning("%s failed: %s", what, e, exc_info=not isinstance(e, gspread.exceptions.APIError))
+    _errors[what] = (time.time(), f"{type(e).__name__}: {e}")
+
+def last_sync_error():
+    """(time, message) of the latest background failure still unresolved, or None."""
+    return max(_errors.values(), default=None)
+
+def _flush_forever(spread, journal):
+    while True:
+        journal.wake.wait(FLUSH_INTERVAL)
+        journal.wake.clear()
+        try:
+            flush_pending(spread, journal)
+            _errors.pop("flush", None)
+        except Exception as e:
+            _failed("flush", e)
+            time.sleep(FLUSH_INTERVAL * 5)  # Sheets unreachable; rows stay queued
+        try:
+            save_snapshots()
+            _errors.pop("snapshot", None)
+        except Exception as e:
+            _failed("snapshot", e)  # read-only or full disk, a frame Arrow refuses: the next start reads Sheets
+
+@st.cache_resource
+def start_flusher():
+    spread = get_spreadsheet(get_client())
+    t = threading.Thread(target=_flush_forever, args=(spread, get_journal()), name="sheets-flusher", daemon=True)
+    t.start()
+    return t
+
+def pending_sync_count() -> int:
+    return get_journal().count()
+
+def parked_count() -> int:
+    return get_journal().parked_count()
+
+def _with_pending(sheet_name: str, df: pd.DataFrame, date: str = None, items: list = None,
+                  through: int = 0) -> pd.DataFrame:
+    # Overlay rows that are committed locally but not yet in Sheets (read-your-writes).
+    # Callers pass `items` taken before reading df, so a row shipped in between is not
+    # lost, and the frame's `through`, so such a row is not shown twice either
+    items = get_journal().pending(sheet_name) if items is None else items
+    rows = [v for seq, v in items if seq > through]
+    if not rows:
+        return df
+    extra = _frame(sheet_name, rows)
+    if date is not None:
+        extra = extra[extra["date"] == date]
+    cols = _key_cols(sheet_name)
+    if cols and set(cols) <= set(df.columns):
+        extra = extra[~_row_keys(extra, cols).isin(_row_keys(df, cols))]
+    return concat_typed(sheet_name, [df, extra])
+
+_upsert_lock = threading.Lock()
+
+# ---------- Diff writer ----------
+_NUMBER = re.compile(r"-?\d+(\.\d+)?$")
+
+def _norm(x):
+    # Compare the way Sheets stores it: 100, 100.0 and "100" are the same cell
+    x = to_cell(x)
+    if isinstance(x, bool):
+        return x
+    if isinstance(x, (int, float)) or (isinstance(x, str) and _NUMBER.match(x)):
+        return float(x)
+    return str(x)
+
+def _cell(x) -> dict:
+    """A value as a CellData, parsed like USER_ENTERED would for numbers."""
+    x = _norm(x)
+    if x == "":
+        return {}
+    if isinstance(x, bool):
+        return {"userEnteredValue": {"boolValue": x}}
+    if isinstance(x, float):
+        return {"userEnteredValue": {"numberValue": x}}
+    return {"userEnteredValue": {"stringValue": x}}
+
+def _diff_requests(sheet_id: int, old: list, new: list) -> list:
+    """
+    batchUpdate requests turning data rows `old` into `new` (header excluded):
+    one updateCells per run of changed cells, one deleteDimension for rows
+    that went away and one appendCells for rows that are new.
+    """
+    requests = []
+    for i, (a, b) in enumerate(zip(old, new)):
+        j = 0
+        while j < len(b):
+            if _norm(a[j]) == _norm(b[j]):
+                j += 1
+                continue
+            k = j
+            while k < len(b) and _norm(a[k]) != _norm(b[k]):
+                k += 1
+            requests.append({"updateCells": {
+                "range": {"sheetId": sheet_id, "startRowIndex": i + 1, "endRowIndex": i + 2,
+                          "startColumnIndex": j, "endColumnIndex": k},
+                "rows": [{"values": [_cell(x) for x in b[j:k]]}],
+                "fields": "userEnteredValue",
+            }})
+            j = k
+    if len(old) > len(new):
+        requests.append({"deleteDimension": {"range": {
+            "sheetId": sheet_id, "dimension": "ROWS", "startIndex": len(new) + 1, "endIndex": len(old) + 1,
+        }}})
+    if len(new) > len(old):
+        requests.append({"appendCells": {
+            "sheetId": sheet_id,
+            "rows": [{"values": [_cell(x) for x in row]} for row in new[len(old):]],
+            "fields": "userEnteredValue",
+        }})
+    return requests
+
+# ---------- Google Sheets backend ----------
+class SheetsBackend(Backend):
+    def bootstrap(self):
+        # Every rerun calls this; after the first success it costs nothing
+        _bootstrapped(schema_fingerprint())
+        start_flusher()
+
+    def _read_worksheet(self, name: str, date: str = None) -> pd.DataFrame:
+        # The cached frame is never modified in place (loads swap in a new one), so
+        # readers share its data; the shallow copy only keeps column edits local.
+        # `date` (tail sheets only) returns just that day's rows, sliced by index.
+        pending = get_journal().pending(name)
+        try:
+            with timed("read_df", name, "hit" if _entry(name).fresh() else "miss"):
+                if base_sheet(name) != name and name not in partition_names():
+                    df, through = _frame(name, []), 0
+                elif _is_tail(name):
+                    _read_tail(name)
+                    df, through = _entry(name).view(date)
                 else:
-                    data = rows
-                df = pd.DataFrame(data, columns=hdrs[:len(data[0])] if data else hdrs)
+                    _read_batched(name)
+                    df, through = _entry(name).view()
+        except Exception as e:
+            if _missing_sheet(e):
+                invalidate_handles()  # next rerun re-checks the schema and re-pools handles
+            raise
+        return _with_pending(name, df, date, pending, through)
+
+    def read_df(self, sheet_name: str, date: str = None) -> pd.DataFrame:
+        if sheet_name in PARTITIONED:
+            return self.read_range(sheet_name, date, date)
+        df = self._read_worksheet(sheet_name)
+        if date is not None and "date" in df.columns:
+            df = df[df["date"] == date].reset_index(drop=True)
+        return df
+
+    def read_range(self, sheet_name: str, start: str = None, end: str = None) -> pd.DataFrame:
+        if sheet_name not in PARTITIONED:
+            return super().read_range(sheet_name, start, end)
+        if start == end and start is not None:
+            # One day: an index slice of its month (plus the legacy tab in the first month)
+            frames = [self._read_worksheet(n, date=start) for n in partitions_for(sheet_name, start, end)]
+            df = frames[0] if len(frames) == 1 else concat_typed(sheet_name, frames)
+            return df.reset_index(drop=True)
+        # Only the month partitions the range touches are loaded, concurrently
+        frames = _parallel(self._read_worksheet, partitions_for(sheet_name, start, end))
+        df = concat_typed(sheet_name, frames)
+        if start is not None or end is not None:
+            d = df["date"].astype(str)
+            mask = (d >= str(start or "")) & (d <= str(end or "9999"))
+            df = df[mask].reset_index(drop=True)
+        return df
+
+    def iter_range(self, sheet_name: str, start: str = None, end: str = None):
+        if sheet_name not in PARTITIONED:
+            yield self.read_range(sheet_name, start, end)
+            return
+        live = _live_partitions(sheet_name)
+        for name in partitions_for(sheet_name, start, end):
+            if (name in live or _entry(name).df is not None
+                    or (base_sheet(name) != name and name not in partition_names())):
+                df = self._read_worksheet(name)  # still written to, already in memory or not created yet
             else:
-                df = pd.DataFrame(columns=hdrs)
-            out[s] = df
-        return out
+                # Closed month, fetched for this caller only: a year of exports should not stay cached
+                pending, shipped = get_journal().pending(name), _shipped.get(name, 0)
+                last_col = _col_letters(len(_headers(name)))
+                resp = _with_retry(get_spreadsheet(get_client()).values_get, f"{name}!A1:{last_col}", params=_RENDER)
+                df = _with_pending(name, _frame(name, resp.get("values", [])), items=pending, through=shipped)
+            d = df["date"].astype(str)
+            df = df[(d >= str(start or "")) & (d <= str(end or "9999"))].reset_index(drop=True)
+            if len(df):
+                yield df
+
+    def revalidate(self, sheet_names):
+        # Of a partitioned sheet only the live worksheets: closed months do not change
+        live = set().union(*(_live_partitions(s) for s in sheet_names if s in PARTITIONED))
+        due = [n for n, e in list(_sheet_cache().items())
+               if base_sheet(n) in sheet_names and e.df is not None and not e.fresh()
+               and (base_sheet(n) not in PARTITIONED or n in live)]
+        try:
+            _parallel(lambda n: _read_tail(n) if _is_tail(n) else _read_batched(n), due)
+            _errors.pop("revalidate", None)
+        except Exception as e:
+            _failed("revalidate", e)  # offline: keep serving what is cached
+
+    def append_row(self, sheet_name: str, row: dict):
+        # Committed to the local journal instantly; the flusher ships it to Sheets
+        headers = HEADERS[sheet_name]
+        values = [row.get(h, "") for h in headers]
+        if sheet_name in PARTITIONED:
+            sheet_name = partition_of(sheet_name, row.get("date", ""))
+        get_journal().add(sheet_name, values)
+
+    def append_rows(self, sheet_name: str, rows: list):
+        headers = HEADERS[sheet_name]
+        targets = {}
+        for row in rows:
+            name = partition_of(sheet_name, row.get("date", "")) if sheet_name in PARTITIONED else sheet_name
+            targets.setdefault(name, []).append([row.get(h, "") for h in headers])
+        for name, values in targets.items():
+            get_journal().add_many(name, values)
+
+    def write_df(self, sheet_name: str, df: pd.DataFrame):
+        if sheet_name in PARTITIONED:
+            raise ValueError(f"{sheet_name} is append-only; use append_row")
+        gc = get_client()
+        spread = get_spreadsheet(gc)
+        # df was built from read_df (incl. queued rows), so ship those first to keep order
+        flush_pending(spread, get_journal(), sheet_name)
+        headers = HEADERS[sheet_name]
+        out = df.copy()
+        for h in headers:
+            if h not in out.columns:
+                out[h] = ""
+        out = out[headers]
+        # Diff against what the sheet holds now (probed first); unchanged cells are never sent
+        prior = _revalidate(spread).get(sheet_name, "") if _versioned(sheet_name) else ""
+        old = _read_tail(sheet_name) if _is_tail(sheet_name) else _read_batched(sheet_name)
+        token = _new_token()
+        def batch():
+            ws = get_worksheet(spread, sheet_name)
+            diff = _diff_requests(ws.id, to_cells(old[headers]), to_cells(out))
+            # The new token goes in the same (atomic) batch as the data
+            return diff + [_token_cell(spread, sheet_name, token)] if diff and _versioned(sheet_name) else diff
+        reqs = batch()
+        if reqs:
+            try:
+                _with_retry(spread.batch_update, {"requests": reqs})
+            except Exception as e:
+                if not _missing_sheet(e):
+                    raise
+                # Pooled sheetId went stale (sheet recreated); look it up once more
+                invalidate_handles()
+                _with_retry(spread.batch_update, {"requests": batch()})
+        # Write-through: only this sheet's entry changes, nothing is refetched
+        _entry(sheet_name).load(sheet_name, typed(sheet_name, out.reset_index(drop=True)),
+                                through=_shipped.get(sheet_name, 0))
+        if reqs and _versioned(sheet_name):
+            _adopt(sheet_name, prior, token)
+
+    def upsert_rows(self, sheet_name: str, rows: list, key):
+        # One values.batchUpdate of the rows that exist instead of diffing the whole sheet
+        if sheet_name in PARTITIONED:
+            raise ValueError(f"{sheet_name} is append-only; use append_row")
+        spread = get_spreadsheet(get_client())
+        with _upsert_lock:
+            # A queued row with this key has to land first, or it would be appended twice
+            flush_pending(spread, get_journal(), sheet_name)
+            prior = _revalidate(spread).get(sheet_name, "") if _versioned(sheet_name) else ""
+            df = _read_tail(sheet_name) if _is_tail(sheet_name) else _read_batched(sheet_name)
+            first = first_rows(df, key)
+            hits, new = {}, []
+            for row in rows:
+                i = first.get(key_of(row, key))
+                if i is None:
+                    new.append(row)
+                else:
+                    hits[i] = row
+            if hits:
+                at, headers = sorted(hits), HEADERS[sheet_name]
+                fixed = typed(sheet_name, pd.DataFrame(
+                    [[hits[i].get(h, df[h].iloc[i]) for h in headers] for i in at], columns=headers))
+                last_col = _col_letters(len(headers))
+                # Sheet row of position i: header + 1-based
+                data = [{"range": f"{sheet_name}!A{i + 2}:{last_col}{i + 2}", "values": [cells]}
+                        for i, cells in zip(at, to_cells(fixed))]
+                token = _new_token()
+                if _versioned(sheet_name):
+                    data.append({"range": _token_range(sheet_name), "values": [[token]]})
+                _with_retry(spread.values_batch_update, {"valueInputOption": "USER_ENTERED", "data": data})
+                pieces, start = [], 0
+                for n, i in enumerate(at):
+                    pieces += [df.iloc[start:i], fixed.iloc[n:n + 1]]
+                    start = i + 1
+                _entry(sheet_name).load(sheet_name, concat_typed(sheet_name, pieces + [df.iloc[start:]]),
+                                        through=_shipped.get(sheet_name, 0))
+                if _versioned(sheet_name):
+                    _adopt(sheet_name, prior, token)
+            if new:
+                self.append_rows(sheet_name, new)
 
-def clear_cache():
-    _batch_read_all.clear()  # only clear our batched cache
+@st.cache_resource
+def get_backend() -> Backend:
+    # STORAGE = "sqlite" keeps data in a local file; Sheets then only mirrors it (if SHEET_ID is set)
+    if secret("STORAGE", "sheets") == "sqlite":
+        from lib.sqlstore import SQLiteBackend, DEFAULT_PATH
+        replica = SheetsBackend() if secret("SHEET_ID") else None
+        return SQLiteBackend(secret("LOCAL_DB", DEFAULT_PATH), replica=replica)
+    return SheetsBackend()
 
 # ---------- Public API used by views ----------
-def read_df(sheet_name: str) -> pd.DataFrame:
-    return _batch_read_all().get(sheet_name, pd.DataFrame(columns=HEADERS[sheet_name]))
+def bootstrap():
+    get_backend().bootstrap()
+
+def read_df(sheet_name: str, date: str = None) -> pd.DataFrame:
+    return get_backend().read_df(sheet_name, date)
+
+def read_range(sheet_name: str, start: str = None, end: str = None) -> pd.DataFrame:
+    """Rows dated start..end inclusive (ISO dates); partitioned sheets load only what the range needs."""
+    return get_backend().read_range(sheet_name, start, end)
+
+def iter_range(sheet_name: str, start: str = None, end: str = None):
+    """read_range in pieces (one partition or page at a time), in row order."""
+    return get_backend().iter_range(sheet_name, start, end)
 
 def append_row(sheet_name: str, row: dict):
-    gc = get_client()
-    spread = get_spreadsheet(gc)
-    ws = spread.worksheet(sheet_name)
-    headers = HEADERS[sheet_name]
-    values = [row.get(h, "") for h in headers]
-    _with_retry(ws.append_row, values, value_input_option="USER_ENTERED")
-    clear_cache()
+    get_backend().append_row(sheet_name, row)
+    with _version_lock:
+        old = _versions[sheet_name]
+        _bump(sheet_name)
+        for fn in _append_listeners:
+            fn(sheet_name, row, old, _versions[sheet_name])
+
+def append_rows(sheet_name: str, rows: list):
+    """Like append_row for many rows, committed together."""
+    get_backend().append_rows(sheet_name, rows)
+    with _version_lock:
+        for row in rows:
+            old = _versions[sheet_name]
+            _bump(sheet_name)
+            for fn in _append_listeners:
+                fn(sheet_name, row, old, _versions[sheet_name])
+
+def upsert(sheet_name: str, row: dict):
+    """Update the row with row's key (schema.KEYS) in place, or append it."""
+    get_backend().upsert(sheet_name, row, KEYS[sheet_name])
+    _bump(sheet_name)
+
+def upsert_rows(sheet_name: str, rows: list):
+    """upsert for many rows, written together."""
+    get_backend().upsert_rows(sheet_name, rows, KEYS[sheet_name])
+    _bump(sheet_name)
 
 def write_df(sheet_name: str, df: pd.DataFrame):
-    gc = get_client()
-    spread = get_spreadsheet(gc)
-    ws = spread.worksheet(sheet_name)
-    headers = HEADERS[sheet_name]
-    out = df.copy()
-    for h in headers:
-        if h not in out.columns:
-            out[h] = ""
-    out = out[headers]
-    _with_retry(ws.clear)
-    _with_retry(ws.update, '1:1', [headers])
-    if len(out) > 0:
-        _with_retry(
-            ws.update,
-            "A2",
-            [[("" if pd.isna(x) else x) for x in row] for row in out.to_numpy()],
-            value_input_option="USER_ENTERED",
-        )
-    clear_cache()
+    get_backend().write_df(sheet_name, df)
+    _bump(sheet_name)
@@ -0,0 +1,137 @@
+# lib/sqlstore.py
+# Embedded SQLite store: one table per schema sheet, indexed for date lookups.
+import os
+import sqlite3
+import threading
+import pandas as pd
+from lib.backend import Backend
+from lib.schema import SHEETS, HEADERS, typed, to_cell, to_cells
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".data", "store.db")
+INDEXED = ("date", "category", "id")
+PAGE_ROWS = 50000  # rows per frame from iter_range
+
+class SQLiteBackend(Backend):
+    """
+    Primary store is a local SQLite file. When `replica` is given (a
+    SheetsBackend) every write is also shipped to Google Sheets.
+    """
+    def __init__(self, path: str = DEFAULT_PATH, replica: Backend = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.replica = replica
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            for s in SHEETS:
+                cols = ", ".join(f'"{h}"' for h in HEADERS[s])
+                self._db.execute(f'CREATE TABLE IF NOT EXISTS "{s}" ({cols})')
+                for c in INDEXED:
+                    if c in HEADERS[s]:
+                        self._db.execute(f'CREATE INDEX IF NOT EXISTS "ix_{s}_{c}" ON "{s}" ("{c}")')
+
+    def _count(self, sheet_name: str) -> int:
+        with self._lock:
+            return self._db.execute(f'SELECT COUNT(*) FROM "{sheet_name}"').fetchone()[0]
+
+    def bootstrap(self):
+        if self.replica is None:
+            return
+        self.replica.bootstrap()
+        # First run against an existing workbook: import what Sheets already has
+        for s in SHEETS:
+            if self._count(s) == 0:
+                df = self.replica.read_df(s)
+                if len(df):
+                    self._replace(s, df)
+
+    def read_df(self, sheet_name: str, date: str = None) -> pd.DataFrame:
+        cols = ", ".join(f'"{h}"' for h in HEADERS[sheet_name])
+        sql, params = f'SELECT {cols} FROM "{sheet_name}"', []
+        if date is not None and "date" in HEADERS[sheet_name]:
+            sql, params = sql + " WHERE date = ?", [date]
+        with self._lock:
+            df = pd.read_sql_query(sql + " ORDER BY rowid", self._db, params=params)
+        return typed(sheet_name, df)
+
+    def read_range(self, sheet_name: str, start: str = None, end: str = None) -> pd.DataFrame:
+        if "date" not in HEADERS[sheet_name]:
+            return self.read_df(sheet_name)
+        cols = ", ".join(f'"{h}"' for h in HEADERS[sheet_name])
+        sql = f'SELECT {cols} FROM "{sheet_name}" WHERE date >= ? AND date <= ? ORDER BY rowid'
+        with self._lock:
+            df = pd.read_sql_query(sql, self._db, params=[str(start or ""), str(end or "9999")])
+        return typed(sheet_name, df)
+
+    def iter_range(self, sheet_name: str, start: str = None, end: str = None):
+        if "date" not in HEADERS[sheet_name]:
+            yield self.read_df(sheet_name)
+            return
+        # Keyset pages: the lock is only held while one page is read
+        cols = ", ".join(f'"{h}"' for h in HEADERS[sheet_name])
+        sql = (f'SELECT rowid AS _rowid, {cols} FROM "{sheet_name}" '
+               f'WHERE date >= ? AND date <= ? AND rowid > ? ORDER BY rowid LIMIT {PAGE_ROWS}')
+        after = 0
+        while True:
+            with self._lock:
+                df = pd.read_sql_query(sql, self._db, params=[str(start or ""), str(end or "9999"), after])
+            if df.empty:
+                return
+            after = int(df["_rowid"].iloc[-1])
+            yield typed(sheet_name, df.drop(columns="_rowid"))
+            if len(df) < PAGE_ROWS:
+                return
+
+    def append_row(self, sheet_name: str, row: dict):
+        headers = HEADERS[sheet_name]
+        marks = ", ".join("?" * len(headers))
+        with self._lock, self._db:
+            self._db.execute(f'INSERT INTO "{sheet_name}" VALUES ({marks})', [to_cell(row.get(h, "")) for h in headers])
+        if self.replica is not None:
+            self.replica.append_row(sheet_name, row)
+
+    def append_rows(self, sheet_name: str, rows: list):
+        headers = HEADERS[sheet_name]
+        marks = ", ".join("?" * len(headers))
+        with self._lock, self._db:
+            self._db.executemany(f'INSERT INTO "{sheet_name}" VALUES ({marks})',
+                                 [[to_cell(r.get(h, "")) for h in headers] for r in rows])
+        if self.replica is not None:
+            self.replica.append_rows(sheet_name, rows)
+
+    def _replace(self, sheet_name: str, df: pd.DataFrame):
+        headers = HEADERS[sheet_name]
+        out = df.reindex(columns=headers, fill_value="")
+        marks = ", ".join("?" * len(headers))
+        with self._lock, self._db:
+            self._db.execute(f'DELETE FROM "{sheet_name}"')
+            self._db.executemany(
+                f'INSERT INTO "{sheet_name}" VALUES ({marks})',
+                to_cells(out),
+            )
+
+    def upsert_rows(self, sheet_name: str, rows: list, key):
+        keys = [key] if isinstance(key, str) else list(key)
+        where = " AND ".join(f'"{k}" = ?' for k in keys)
+        hits, new = [], []
+        with self._lock, self._db:
+            for row in rows:
+                cols = [h for h in HEADERS[sheet_name] if h in row]
+                sets = ", ".join(f'"{c}" = ?' for c in cols)
+                first = self._db.execute(f'SELECT MIN(rowid) FROM "{sheet_name}" WHERE {where}',
+                                         [to_cell(row[k]) for k in keys]).fetchone()[0]
+                if first is None:
+                    new.append(row)
+                else:
+                    self._db.execute(f'UPDATE "{sheet_name}" SET {sets} WHERE rowid = ?',
+                                     [to_cell(row[c]) for c in cols] + [first])
+                    hits.append(row)
+        if new:
+            self.append_rows(sheet_name, new)  # also mirrors them
+        if hits and self.replica is not None:
+            self.replica.upsert_rows(sheet_name, hits, key)
+
+    def write_df(self, sheet_name: str, df: pd.DataFrame):
+        self._replace(sheet_name, df)
+        if self.replica is not None:
+            self.replica.write_df(sheet_name, df)
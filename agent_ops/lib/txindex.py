@@ -0,0 +1,150 @@
+# lib/txindex.py
+# Hash index over every transaction: id -> date, ref -> ids, and which rows were
+# reversed. Built once, then kept current on append, so looking a row up or
+# checking whether it was already undone never scans history. Rows written
+# elsewhere only re-index the live months.
+import threading
+from lib.sheets import read_df, iter_range, append_row, data_version, fresh_version, on_append, live_since
+from lib.utils import today_str, now_iso, new_id, shift_day
+
+REVERSAL = "reversal"  # sub_type of a row undoing another; its ref is the original's id
+NEGATED = ["fee", "total_paid_by_customer", "cash_delta", "pos_delta", "transfer_delta", "gas_kg_delta"]
+
+class TxIndex:
+    """
+    Only keys and dates are held; the row itself comes from its day's cached
+    frame. Rows of closed months (dated before `since`) are indexed in `base`,
+    which a rebuild keeps, so only the live months are read again. `version`
+    is the transactions data version it reflects.
+    """
+    def __init__(self, version: tuple, base: "TxIndex" = None, since: str = None):
+        self.dates = {}        # id -> date
+        self.by_ref = {}       # ref -> [id, ...] (reversals excluded)
+        self.reversed_by = {}  # original id -> reversing id
+        self.base = base
+        self.since = since
+        self.version = version
+
+    @classmethod
+    def build(cls, prior: "TxIndex" = None) -> "TxIndex":
+        since = live_since()
+        base = prior.base if prior is not None and prior.since == since else None
+        if base is None:
+            # One partition at a time and uncached, so closed months are not pinned in memory
+            base = cls(None)
+            base._read(iter_range("transactions", None, shift_day(since, -1)))
+        idx = cls(None, base, since)
+        idx._read(iter_range("transactions", since, None))
+        # Taken after reading: a cache refresh on the way may bump the version
+        idx.version = data_version("transactions")
+        return idx
+
+    def _read(self, frames):
+        for tx in frames:
+            for rid, date, sub_type, ref in zip(tx["id"].astype(str), tx["date"].astype(str),
+                                                tx["sub_type"].astype(str), tx["ref"].astype(str)):
+                self.add(rid, date, sub_type, ref)
+
+    def add(self, rid: str, date: str, sub_type: str, ref: str):
+        if not rid:
+            return
+        self.dates[rid] = date
+        if not ref:
+            return
+        if sub_type == REVERSAL:
+            self.reversed_by.setdefault(ref, rid)
+        else:
+            self.by_ref.setdefault(ref, []).append(rid)
+
+    def date_of(self, rid: str):
+        date = self.dates.get(rid)
+        return date if date is not None or self.base is None else self.base.date_of(rid)
+
+    def refs(self, ref: str) -> list:
+        return (self.base.refs(ref) if self.base is not None else []) + self.by_ref.get(ref, [])
+
+    def reversal(self, rid: str):
+        # The earliest reversal counts, and closed months come first
+        done = self.base.reversal(rid) if self.base is not None else None
+        return done if done is not None else self.reversed_by.get(rid)
+
+_index = None
+_lock = threading.Lock()
+_reverse_lock = threading.Lock()
+
+def _current() -> TxIndex:
+    global _index
+    version = fresh_version("transactions")
+    with _lock:
+        if _index is not None and _index.version == version:
+            return _index
+        prior = _index
+    idx = TxIndex.build(prior)
+    with _lock:
+        _index = idx
+    return idx
+
+def find(key: str) -> list:
+    """Ids of transactions whose id or ref is `key`; an id match comes first."""
+    key = str(key).strip()
+    idx = _current()
+    with _lock:
+        ids = [key] if idx.date_of(key) is not None else []
+        return ids + [i for i in idx.refs(key) if i != key]
+
+def transaction(rid: str):
+    """The transaction with id `rid` as a dict, or None."""
+    idx = _current()
+    with _lock:
+        date = idx.date_of(rid)
+    if date is None:
+        return None
+    day = read_df("transactions", date=date)
+    hit = day[day["id"] == rid]
+    return None if hit.empty else hit.iloc[-1].to_dict()
+
+def reversal_of(rid: str):
+    """Id of the row that reversed `rid`, or None."""
+    idx = _current()
+    with _lock:
+        return idx.reversal(rid)
+
+def reversal_row(tx: dict, category: str = "correction", note: str = "", user: str = "admin") -> dict:
+    """A row with the opposite money and stock effect of `tx`, dated today."""
+    row = {
+        "id": new_id(), "datetime": now_iso(), "date": today_str(),
+        "user": user, "role": "admin",
+        "category": category, "sub_type": REVERSAL,
+        "customer_method": str(tx.get("customer_method", "")), "provider_method": str(tx.get("provider_method", "")),
+        "amount_value": 0.0, "gas_kg": "", "price_per_kg": "",
+        "note": note or f"Reversal of {tx['id']}", "ref": tx["id"],
+    }
+    for c in NEGATED:
+        row[c] = 0.0 - float(tx.get(c) or 0.0)  # not -0.0
+    return row
+
+def reverse(rid: str, category: str = "correction", note: str = "", user: str = "admin") -> dict:
+    """Append the reversal of `rid`; ValueError if it is missing, a reversal itself or already reversed."""
+    with _reverse_lock:
+        tx = transaction(rid)
+        if tx is None:
+            raise ValueError(f"No transaction {rid}")
+        if tx.get("sub_type") == REVERSAL:
+            raise ValueError(f"{rid} is itself the reversal of {tx['ref']}")
+        done = reversal_of(rid)
+        if done is not None:
+            raise ValueError(f"{rid} was already reversed by {done}")
+        row = reversal_row(tx, category, note, user)
+        append_row("transactions", row)
+    return row
+
+@on_append
+def _on_append(sheet_name, row, old, new):
+    # Index an appended transaction instead of rebuilding
+    if sheet_name != "transactions":
+        return
+    with _lock:
+        if _index is not None and _index.version == (old,):
+            _index.add(str(row.get("id", "")), str(row.get("date", "")),
+                       str(row.get("sub_type", "")), str(row.get("ref", "")))
+            _index.version = (new,)
@@ -1,15 +1,18 @@
 # lib/utils.py
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from pytz import timezone
 import streamlit as st
-import pandas as pd
-from lib.sheets import read_df, write_df
+from lib.config import config, set_value
 
 TZ = timezone("Africa/Lagos")
 
 def today_str():
     return datetime.now(TZ).date().isoformat()
 
+def shift_day(day: str, days: int) -> str:
+    """'2026-10-17', 1 -> '2026-10-18'"""
+    return (date.fromisoformat(str(day)) + timedelta(days=days)).isoformat()
+
 def now_iso():
     return datetime.now(TZ).isoformat()
 
@@ -22,28 +25,15 @@ def naira(x):
 def new_id(prefix="tx"):
     return f"{prefix}_{datetime.now(TZ).strftime('%Y%m%d%H%M%S%f')}"
 
-# ---- config helpers (also stores simple flags in config_prices) ----
+# ---- config helpers (kept for callers; lib.config.config() is the snapshot) ----
 def get_price(key: str, default=0.0):
-    cfg = read_df("config_prices")
-    row = cfg[cfg["key"] == key]
-    if row.empty: return default
-    try: return float(row.iloc[0]["value"])
-    except Exception: return default
+    return config().price(key, default)
 
 def set_price(key: str, value):
-    cfg = read_df("config_prices")
-    if cfg.empty:
-        cfg = pd.DataFrame({"key":[key], "value":[value]})
-    else:
-        if key in cfg["key"].values:
-            cfg.loc[cfg["key"]==key, "value"] = value
-        else:
-            cfg = pd.concat([cfg, pd.DataFrame({"key":[key], "value":[value]})], ignore_index=True)
-    write_df("config_prices", cfg)
+    set_value(key, value)
 
 def get_flag(key: str, default=False):
-    val = str(get_price(key, 1 if default else 0)).strip().lower()
-    return val in ("1","true","yes","y","on")
+    return config().flag(key, default)
 
 def set_flag(key: str, value: bool):
-    set_price(key, 1 if value else 0)
\ No newline at end of file
+    set_value(key, 1 if value else 0)
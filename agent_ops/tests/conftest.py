@@ -0,0 +1,65 @@
+# tests/conftest.py
+# Every test runs against the in-memory Sheets stand-in from bench/, with its
+# own journal and empty caches, so nothing touches the network or .data/.
+import argparse
+import os
+import sys
+from datetime import datetime
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture(scope="session", autouse=True)
+def secrets(tmp_path_factory):
+    # Must be in place before anything reads st.secrets
+    from streamlit import config, logger
+    from bench.__main__ import _secrets
+    path = _secrets(str(tmp_path_factory.mktemp("secrets")), argparse.Namespace(quota=0))
+    config.set_option("secrets.files", [path])
+    logger.set_log_level("error")
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    from lib import sheets
+    from lib.journal import Journal
+    j = Journal(str(tmp_path / "journal.db"))
+    monkeypatch.setattr(sheets, "get_journal", lambda: j)
+    return j
+
+@pytest.fixture
+def fake(journal, monkeypatch):
+    """(http, client) serving a small legacy-layout workbook as SHEET_ID."""
+    from lib import sheets
+    from lib.utils import TZ
+    from bench.__main__ import SHEET_ID, reset_process
+    from bench.data import workbook
+    from bench.fake_gspread import FakeClient, FakeHTTPClient
+    http = FakeHTTPClient()
+    client = FakeClient(http)
+    monkeypatch.setattr(sheets, "get_client", lambda: client)
+    http.load(SHEET_ID, workbook(400, datetime.now(TZ).date()))
+    reset_process()
+    sheets.ensure_all_sheets(client)
+    yield http, client
+    reset_process()
+
+@pytest.fixture
+def monthly(fake):
+    """Like fake, but four months of history in one worksheet per month."""
+    from lib import sheets
+    from lib.utils import TZ
+    from bench.__main__ import SHEET_ID, reset_process
+    from bench.data import workbook
+    http, client = fake
+    http.load(SHEET_ID, workbook(20000, datetime.now(TZ).date(), layout="monthly"))
+    reset_process()
+    sheets.ensure_all_sheets(client)
+    return http, client
+
+@pytest.fixture
+def sheet_rows(fake):
+    """sheet_rows(title): data rows of a fake worksheet, header excluded."""
+    from bench.__main__ import SHEET_ID
+    http, _ = fake
+    return lambda title: http.books[SHEET_ID][title]["rows"][1:]
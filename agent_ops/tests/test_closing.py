@@ -0,0 +1,35 @@
+import pytest
+from lib import sheets
+from lib.closing import close_day, closing_for
+from lib.ledger import snapshot
+from lib.utils import today_str, shift_day
+
+def test_close_records_expected_and_variance(fake):
+    day = today_str()
+    s = snapshot(day)
+    row = close_day(day, s.cash - 500, s.gas, user="admin")
+    assert row["cash_expected"] == s.cash and row["cash_variance"] == -500
+    assert row["tx_count"] == s.count == 200
+    assert closing_for(day)["closed_by"] == "admin"
+    with pytest.raises(ValueError, match="already closed"):
+        close_day(day, 0, 0)
+
+def test_close_seeds_the_next_day_from_the_counts(fake):
+    day = today_str()
+    s = snapshot(day)
+    close_day(day, 1234.0, 55.5)
+    nxt = snapshot(shift_day(day, 1))
+    assert nxt.opening_source == "opening"
+    assert nxt.opening["cash_delta"] == 1234.0 and nxt.opening["gas_kg_delta"] == 55.5
+    assert nxt.opening["transfer_delta"] == s.transfer
+    # A later day nobody opened starts from there too
+    later = snapshot(shift_day(day, 3))
+    assert later.opening_source == f"opening of {shift_day(day, 1)}"
+    assert later.opening["cash_delta"] == 1234.0
+
+def test_close_keeps_an_opening_already_made(fake):
+    day, nxt = today_str(), shift_day(today_str(), 1)
+    sheets.append_row("daily_openings", {"date": nxt, "attendant": "me", "cash_open": 999})
+    close_day(day, 1234.0, 55.5)
+    opens = sheets.read_df("daily_openings", date=nxt)
+    assert list(opens["attendant"]) == ["me"]
@@ -0,0 +1,31 @@
+import pandas as pd
+from lib import sheets
+from lib.config import Config, config, set_value
+
+def _prices(*rows):
+    return pd.DataFrame(rows, columns=["key", "value"])
+
+def test_price_and_flag_parsing():
+    cfg = Config(_prices(("gas", "1200"), ("gas", "999"), ("on", 1.0), ("off", "0"), ("yes", "Yes"), ("bad", "x")),
+                 fees=None)
+    assert cfg.price("gas") == 1200.0  # first row wins
+    assert cfg.price("bad", 7.0) == 7.0 and cfg.price("missing", 5.0) == 5.0
+    assert cfg.flag("on") and not cfg.flag("off") and cfg.flag("yes") and not cfg.flag("bad")
+    assert cfg.flag("missing", True)
+
+def test_set_value_writes_one_row(fake, sheet_rows):
+    http, _ = fake
+    assert config().price("gas_price_per_kg") == 1200.0
+    http.reset_counts()
+    set_value("gas_price_per_kg", 1500)
+    assert http.calls["values_batch_update"] == 1 and http.calls["batch_update"] == 0
+    assert sheet_rows("config_prices")[0][:2] == ["gas_price_per_kg", 1500]
+    # The write went through to the cache and the snapshot follows it
+    assert config().price("gas_price_per_kg") == 1500.0
+
+def test_set_value_appends_a_new_key(fake, journal, sheet_rows):
+    http, client = fake
+    set_value("new_flag", "yes")
+    sheets.flush_pending(sheets.get_spreadsheet(client), journal)
+    assert ["new_flag", "yes"] in [r[:2] for r in sheet_rows("config_prices")]
+    assert config().flag("new_flag")
@@ -0,0 +1,35 @@
+import numpy as np
+from lib.dayindex import DayIndex
+
+def _dates(*days):
+    return np.array(days, dtype=object)
+
+def test_sorted_days_are_slices():
+    idx = DayIndex(_dates("2026-10-01", "2026-10-01", "2026-10-02", "2026-10-04"))
+    assert idx.order is None
+    assert idx.rows("2026-10-01") == slice(0, 2)
+    assert idx.rows("2026-10-04") == slice(3, 4)
+
+def test_missing_day_is_empty():
+    idx = DayIndex(_dates("2026-10-01"))
+    assert idx.rows("2026-10-03") == slice(0, 0)
+    assert DayIndex(_dates()).rows("2026-10-01") == slice(0, 0)
+
+def test_unsorted_days_keep_row_order():
+    idx = DayIndex(_dates("2026-10-02", "2026-10-01", "2026-10-02", "2026-10-01"))
+    assert idx.order is not None
+    assert list(idx.rows("2026-10-01")) == [1, 3]
+    assert list(idx.rows("2026-10-02")) == [0, 2]
+
+def test_extend_continues_the_last_day():
+    idx = DayIndex(_dates("2026-10-01", "2026-10-02"))
+    assert idx.extend(_dates("2026-10-02", "2026-10-03"))
+    assert idx.rows("2026-10-02") == slice(1, 3)
+    assert idx.rows("2026-10-03") == slice(3, 4)
+    assert idx.n == 4
+
+def test_extend_refuses_rows_out_of_order():
+    idx = DayIndex(_dates("2026-10-02"))
+    assert not idx.extend(_dates("2026-10-01"))
+    assert not idx.extend(_dates("2026-10-04", "2026-10-03"))
+    assert idx.extend(_dates())
@@ -0,0 +1,35 @@
+import csv
+import io
+import pyarrow.parquet as pq
+from lib import sheets
+from lib.export import _arrow_schema, export_transactions
+from lib.schema import HEADERS
+from lib.utils import today_str, shift_day
+
+def _range():
+    # From the first of last month: two month worksheets
+    end = today_str()
+    return shift_day(end[:8] + "01", -1)[:8] + "01", end
+
+def test_csv_is_written_a_partition_at_a_time(monthly):
+    start, end = _range()
+    seen = []
+    f, n = export_transactions(start, end, "CSV", progress=seen.append)
+    rows = list(csv.reader(io.TextIOWrapper(f, encoding="utf-8")))
+    assert rows[0] == HEADERS["transactions"]
+    assert n == len(rows) - 1 == len(sheets.read_range("transactions", start, end))
+    assert len(seen) == 2 and seen[-1] == n
+    assert all(start <= r[2] <= end for r in rows[1:])
+
+def test_parquet_has_the_fixed_schema(monthly):
+    start, end = _range()
+    f, n = export_transactions(start, end, "Parquet")
+    table = pq.read_table(f)
+    assert table.schema.equals(_arrow_schema("transactions"))
+    assert table.num_rows == n > 0
+
+def test_empty_range_still_has_the_columns(fake):
+    f, n = export_transactions("1999-01-01", "1999-01-31", "Parquet")
+    table = pq.read_table(f)
+    assert n == table.num_rows == 0
+    assert table.schema.names == HEADERS["transactions"]
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from lib.fees import TierTable
+
+def _tiers(*rows):
+    return pd.DataFrame(rows, columns=["min_amount", "max_amount", "fee"])
+
+TIERS = _tiers((500, 5000, 50), (5000.01, 10000, 100), (10000.01, 50000, 200))
+
+@pytest.mark.parametrize("amount, fee", [
+    (500, 50), (5000, 50), (5000.01, 100), (10000, 100), (10000.01, 200), (50000, 200),
+    (499.99, 0), (50000.01, 0),
+])
+def test_tier_edges(amount, fee):
+    assert TierTable(TIERS).fee(amount) == fee
+
+def test_vectorised_lookup_matches_single():
+    t = TierTable(TIERS)
+    amounts = [100, 500, 7000, 20000, 60000]
+    assert list(t.fees_for(amounts)) == [t.fee(a) for a in amounts]
+
+def test_unsorted_rows_and_text_cells():
+    t = TierTable(_tiers(("10000.01", "50000", "200"), ("500", "5000", "50"), ("5000.01", "10000", "100")))
+    assert t.problems == []
+    assert t.fee(7500) == 100
+
+def test_overlap_first_tier_wins():
+    t = TierTable(_tiers((500, 6000, 50), (5000, 10000, 100)))
+    assert t.overlapping
+    assert t.fee(5500) == 50
+    assert t.fee(8000) == 100
+    assert any("overlap" in p for p in t.problems)
+
+def test_gap_is_reported_and_free():
+    t = TierTable(_tiers((500, 5000, 50), (6000, 10000, 100)))
+    assert t.fee(5500) == 0
+    assert any("No tier covers" in p for p in t.problems)
+
+def test_empty_table():
+    assert TierTable(pd.DataFrame()).fee(1000) == 0
@@ -0,0 +1,70 @@
+import threading
+import time
+import pytest
+from gspread.exceptions import APIError
+from lib import governor
+from lib.governor import Governor
+from bench.fake_gspread import _Response
+
+class _Sheet:
+    """Stands in for a gspread object: the governor keys reads on type, id and method name."""
+    id = "book"
+
+    def __init__(self, fail: list = ()):
+        self.fail = list(fail)
+        self.calls = 0
+
+    def values_get(self, rng):
+        self.calls += 1
+        time.sleep(0.1)
+        if self.fail:
+            raise APIError(_Response(self.fail.pop(0), "refused"))
+        return {"range": rng}
+
+    def values_append(self, rng):
+        return {"updates": rng}
+
+@pytest.fixture(autouse=True)
+def quick_backoff(monkeypatch):
+    monkeypatch.setattr(governor, "BACKOFF_BASE", 0.05)
+    monkeypatch.setattr(governor.random, "uniform", lambda a, b: 1.0)
+
+def test_429_is_retried_and_pauses_everyone():
+    gov, sheet = Governor(), _Sheet(fail=[429])
+    before = time.monotonic()
+    assert gov.call(sheet.values_get, "A1") == {"range": "A1"}
+    assert sheet.calls == 2
+    assert gov._paused_until > before
+
+def test_other_errors_are_not_retried():
+    gov, sheet = Governor(), _Sheet(fail=[400])
+    with pytest.raises(APIError):
+        gov.call(sheet.values_get, "A1")
+    assert sheet.calls == 1
+
+def test_identical_concurrent_reads_share_one_call():
+    gov, sheet = Governor(), _Sheet()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gov.call(sheet.values_get, "A1"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sheet.calls == 1
+    assert results == [{"range": "A1"}] * 4
+
+def test_reads_do_not_wait_for_a_writer_out_of_quota():
+    gov, sheet = Governor(writes_per_min=1), _Sheet()
+    gov.call(sheet.values_append, "A1")  # the only write token this minute
+    writer = threading.Thread(target=gov.call, args=(sheet.values_append, "A2"))
+    writer.start()
+    time.sleep(0.05)
+    assert gov._writers_waiting == 1
+    started = time.monotonic()
+    gov.call(sheet.values_get, "A1")
+    assert time.monotonic() - started < 1
+    with gov._cond:  # let the writer finish
+        gov._buckets[True].tokens = 1
+        gov._cond.notify_all()
+    writer.join(2)
+    assert not writer.is_alive()
@@ -0,0 +1,101 @@
+import pytest
+from lib import sheets
+from lib.journal import Journal
+from lib.schema import partition_of
+
+TX = partition_of("transactions", "2026-10-01")  # the month worksheet the rows below go to
+
+def _tx(rid: str) -> dict:
+    return {"id": rid, "date": "2026-10-01", "category": "charging", "fee": 100.0, "cash_delta": 100.0}
+
+@pytest.fixture
+def spread(fake):
+    return sheets.get_spreadsheet(fake[1])
+
+def _reopen(journal, monkeypatch) -> Journal:
+    # What the next process finds on disk
+    j = Journal(journal._db.execute("PRAGMA database_list").fetchone()[2])
+    monkeypatch.setattr(sheets, "get_journal", lambda: j)
+    return j
+
+def test_rows_survive_a_restart(journal, monkeypatch):
+    a = journal.add("transactions", ["tx_1"])
+    b, c = journal.add_many("daily_openings", [["2026-10-01"], ["2026-10-02"]])
+    j = _reopen(journal, monkeypatch)
+    assert j.pending("transactions") == [(a, ["tx_1"])]
+    assert j.pending("daily_openings") == [(b, ["2026-10-01"]), (c, ["2026-10-02"])]
+    assert j.count() == 3 and not j.unconfirmed
+
+def test_flush_drains_in_order(journal, spread, sheet_rows):
+    sheets.append_rows("transactions", [_tx("tx_a"), _tx("tx_b")])
+    assert sheets.flush_pending(spread, journal) == 2
+    assert [r[0] for r in sheet_rows(TX)] == ["tx_a", "tx_b"]
+    assert journal.count() == 0
+
+def test_rows_sent_before_a_crash_are_not_sent_twice(journal, spread, sheet_rows, monkeypatch):
+    sheets.append_rows("transactions", [_tx("tx_a"), _tx("tx_b")])
+    _, items = journal.next_batch()
+    journal.mark_sent([seq for seq, _ in items])
+    # Sheets took the first row, then the process died before the ack
+    sheets._ensure_partition(spread, TX)
+    spread.values_append(f"{TX}!A1", params={"valueInputOption": "USER_ENTERED"},
+                         body={"values": [items[0][1]]})
+    j = _reopen(journal, monkeypatch)
+    assert j.unconfirmed == {seq for seq, _ in items}
+    assert sheets.flush_pending(spread, j) == 1
+    assert [r[0] for r in sheet_rows(TX)] == ["tx_a", "tx_b"]
+    assert j.count() == 0 and not j.unconfirmed
+
+def test_row_flushed_between_reads_is_shown_once(journal, spread):
+    # config_users has no key, so only the journal seq can tell the copies apart
+    sheets.read_df("config_users")
+    sheets.append_row("config_users", {"username": "new", "role": "attendant"})
+    items = journal.pending("config_users")  # taken first, as read_df does
+    sheets.flush_pending(spread, journal)
+    df, through = sheets._entry("config_users").view()
+    out = sheets._with_pending("config_users", df, items=items, through=through)
+    assert (out["username"] == "new").sum() == 1
+    # Same when the frame is re-read from Sheets instead of written through
+    sheets.clear_cache("config_users")
+    sheets.read_df("config_users")
+    df, through = sheets._entry("config_users").view()
+    out = sheets._with_pending("config_users", df, items=items, through=through)
+    assert (out["username"] == "new").sum() == 1
+
+def test_queued_row_is_visible_before_it_ships(journal, fake):
+    sheets.append_row("transactions", _tx("tx_q"))
+    assert "tx_q" in set(sheets.read_df("transactions", date="2026-10-01")["id"])
+
+def test_a_batch_sheets_keeps_refusing_is_parked(journal, spread, sheet_rows, fake, monkeypatch):
+    import gspread
+    from bench.fake_gspread import _Response
+    http, _ = fake
+    real = http.values_append
+    def refuse(id, range, params, body):
+        if any(r[0] == "tx_bad" for r in body["values"]):
+            raise gspread.exceptions.APIError(_Response(400, "Invalid value at 'data.values'"))
+        return real(id, range, params, body)
+    monkeypatch.setattr(http, "values_append", refuse)
+    sheets.append_rows("transactions", [_tx("tx_a"), _tx("tx_bad"), _tx("tx_b")])
+    # Refused as a batch, then row by row until the bad one has been refused PARK_AFTER times
+    while journal.parked_count() == 0:
+        try:
+            sheets.flush_pending(spread, journal)
+        except gspread.exceptions.APIError:
+            pass
+    sheets.flush_pending(spread, journal)
+    assert [r[0] for r in sheet_rows(TX)] == ["tx_a", "tx_b"]
+    assert journal.count() == 0 and journal.parked_count() == 1
+    assert "Invalid value" in sheets.last_sync_error()[1]
+
+def test_failed_revalidation_is_recorded(fake, monkeypatch):
+    from lib.metrics import get_metrics
+    sheets.read_df("config_prices")
+    sheets.clear_cache("config_prices")
+    def broken(name):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(sheets, "_read_batched", broken)
+    sheets.get_backend().revalidate(("config_prices",))  # serving the cached frame goes on
+    assert sheets.last_sync_error()[1] == "RuntimeError: boom"
+    m = get_metrics().frame()
+    assert ((m["kind"] == "sync") & (m["name"] == "revalidate") & (m["status"] == "error")).any()
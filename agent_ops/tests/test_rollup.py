@@ -0,0 +1,66 @@
+import pytest
+from lib import rollup, sheets
+from lib.schema import HEADERS
+from lib.utils import today_str, shift_day
+
+def _tx(rid: str, date: str) -> dict:
+    return {"id": rid, "date": date, "category": "charging", "customer_method": "cash",
+            "fee": 100.0, "cash_delta": 100.0}
+
+@pytest.fixture
+def spread(fake):
+    return sheets.get_spreadsheet(fake[1])
+
+def _stored_count(sheet_rows, date: str) -> int:
+    rows = [r for r in sheet_rows("daily_summary") if r[0] == date]
+    keys = [tuple(r[:4]) for r in rows]
+    assert len(keys) == len(set(keys))
+    return sum(int(r[4]) for r in rows)
+
+def test_late_row_from_another_process_is_counted(journal, spread, sheet_rows):
+    day = shift_day(today_str(), -1)
+    assert list(rollup.daily_totals(day, day)["count"]) == [200]  # yesterday is stored now
+    sheets.flush_pending(spread, journal)
+    row = _tx("tx_late", day)
+    spread.values_append("transactions!A1", params={"valueInputOption": "USER_ENTERED"},
+                         body={"values": [[row.get(h, "") for h in HEADERS["transactions"]]]})
+    sheets.clear_cache("transactions")
+    assert len(sheets.read_range("transactions", day, day)) == 201
+    assert list(rollup.daily_totals(day, day)["count"]) == [201]
+    sheets.flush_pending(spread, journal)
+    assert _stored_count(sheet_rows, day) == 201
+
+def test_own_late_row_replaces_the_stored_group(journal, spread, sheet_rows):
+    day = shift_day(today_str(), -1)
+    rollup.daily_totals(day, day)
+    sheets.flush_pending(spread, journal)
+    sheets.append_row("transactions", _tx("tx_late", day))
+    assert list(rollup.daily_totals(day, day)["count"]) == [201]
+    sheets.flush_pending(spread, journal)
+    assert _stored_count(sheet_rows, day) == 201
+
+def test_summary_rows_another_process_stored_are_skipped(journal, spread, sheet_rows):
+    row = {"date": "2026-10-01", "category": "charging", "customer_method": "cash", "provider_method": "",
+           "count": 3, "fee": 300.0}
+    sheets.append_rows("daily_summary", [row])
+    sheets.flush_pending(spread, journal)
+    # Same day and group again (a second process, no crash involved), plus a new group
+    sheets.append_rows("daily_summary", [row, dict(row, category="gas_sale")])
+    sheets.flush_pending(spread, journal)
+    assert [r[1] for r in sheet_rows("daily_summary")] == ["charging", "gas_sale"]
+    assert journal.count() == 0
+
+def test_expected_balance_does_not_depend_on_the_range(journal, fake):
+    # Two days before any opening or close: neither starts from a carried balance
+    sheets.append_rows("transactions", [_tx("tx_a", "2000-01-01"), _tx("tx_b", "2000-01-02")])
+    alone = rollup.daily_totals("2000-01-02", "2000-01-02")
+    both = rollup.daily_totals("2000-01-01", "2000-01-02")
+    assert list(alone["cash"]) == [100.0]
+    assert list(both["cash"]) == [100.0, 100.0]
+
+def test_daily_summary_is_read_past_20000_rows(fake):
+    http, _ = fake
+    rows = http.books["bench"]["daily_summary"]["rows"]
+    rows += [["2000-01-01", f"cat_{i}", "cash", "", 1] for i in range(20005)]
+    sheets.clear_cache("daily_summary")
+    assert len(sheets.read_df("daily_summary")) == 20005
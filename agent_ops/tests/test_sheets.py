@@ -0,0 +1,147 @@
+import threading
+import pytest
+from lib import sheets
+from lib.schema import HEADERS
+
+@pytest.fixture
+def requests(fake, monkeypatch):
+    """Every batch_update request the app sends, in order."""
+    http, _ = fake
+    sent = []
+    real = http.batch_update
+    def spy(id, body):
+        sent.extend(body.get("requests", []))
+        return real(id, body)
+    monkeypatch.setattr(http, "batch_update", spy)
+    return sent
+
+def _kinds(reqs) -> list:
+    return [next(iter(r)) for r in reqs]
+
+def test_tail_read_of_a_full_grid(fake):
+    http, client = fake
+    tab = http.books["bench"]["transactions"]
+    sheets.read_df("transactions")
+    # Grow the tab to exactly its grid size: reading one row past it is refused
+    template = tab["rows"][-1]
+    while len(tab["rows"]) < http._grid_rows(tab):
+        tab["rows"].append([f"tx_fill_{len(tab['rows'])}"] + template[1:])
+    sheets.clear_cache("transactions")
+    assert len(sheets.read_df("transactions")) == len(tab["rows"]) - 1
+    sheets.clear_cache("transactions")
+    http.reset_counts()
+    sheets.read_df("transactions")
+    assert dict(http.calls) == {"values_batch_get": 1}
+
+def test_deleted_rows_fall_back_to_a_full_read(fake):
+    http, _ = fake
+    tab = http.books["bench"]["transactions"]
+    sheets.read_df("transactions")
+    del tab["rows"][5]
+    sheets.clear_cache("transactions")
+    assert len(sheets.read_df("transactions")) == len(tab["rows"]) - 1
+
+def test_write_df_sends_only_changed_cells(requests, sheet_rows):
+    df = sheets.read_df("config_prices")
+    df.loc[0, "value"] = "1500"
+    sheets.write_df("config_prices", df)
+    cells = [r["updateCells"] for r in requests if "updateCells" in r]
+    # The changed cell and the sync_versions token, nothing else
+    assert _kinds(requests) == ["updateCells", "updateCells"]
+    assert cells[0]["range"]["startRowIndex"] == 1 and cells[0]["range"]["startColumnIndex"] == 1
+    assert sheet_rows("config_prices")[0][:2] == ["gas_price_per_kg", 1500]
+
+def test_write_df_without_changes_sends_nothing(requests):
+    sheets.write_df("config_prices", sheets.read_df("config_prices"))
+    assert requests == []
+
+def test_write_df_deletes_and_appends_rows(requests, sheet_rows):
+    df = sheets.read_df("config_fees_withdrawal")
+    sheets.write_df("config_fees_withdrawal", df.iloc[:2])
+    assert "deleteDimension" in _kinds(requests)
+    assert len(sheet_rows("config_fees_withdrawal")) == 2
+    requests.clear()
+    sheets.write_df("config_fees_withdrawal", df)
+    assert "appendCells" in _kinds(requests)
+    assert [r[2] for r in sheet_rows("config_fees_withdrawal")] == [50, 100, 200]
+    # The write went through to the cache: nothing is fetched again
+    assert list(sheets.read_df("config_fees_withdrawal")["fee"]) == [50, 100, 200]
+
+@pytest.fixture
+def snapshots(fake):
+    from lib import diskcache
+    yield
+    diskcache.drop()
+
+def _join_rereads():
+    for t in threading.enumerate():
+        if t.name.startswith("reread-"):
+            t.join()
+
+def _restart_from_snapshot():
+    from bench.__main__ import reset_process
+    sheets.save_snapshots(force=True)
+    reset_process()
+    sheets.read_df("transactions")
+    _join_rereads()
+
+def test_restored_snapshot_is_checked_in_full(fake, snapshots):
+    http, _ = fake
+    sheets.read_df("transactions")
+    tab = http.books["bench"]["transactions"]
+    fee = HEADERS["transactions"].index("fee")
+    tab["rows"][3][fee] = 12345.0  # edited by hand while the app was down
+    _restart_from_snapshot()
+    assert sheets.read_df("transactions")["fee"].iloc[2] == 12345.0
+
+def test_unchanged_snapshot_is_kept(fake, snapshots):
+    sheets.read_df("transactions")
+    _restart_from_snapshot()
+    assert not sheets._entry("transactions").stale  # the full read found nothing to replace
+
+def test_flusher_survives_a_failed_snapshot(fake, journal, monkeypatch):
+    import pyarrow as pa
+    class Wake:
+        calls = 0
+        def wait(self, timeout):
+            Wake.calls += 1
+            if Wake.calls > 2:
+                raise SystemExit  # ends the loop after two rounds
+        def clear(self):
+            pass
+    def refuse(force=False):
+        raise pa.ArrowInvalid("cannot convert")
+    monkeypatch.setattr(journal, "wake", Wake())
+    monkeypatch.setattr(sheets, "save_snapshots", refuse)
+    with pytest.raises(SystemExit):
+        sheets._flush_forever(sheets.get_spreadsheet(fake[1]), journal)
+    assert Wake.calls == 3
+    assert "ArrowInvalid" in sheets.last_sync_error()[1]
+
+def test_hand_edit_of_a_tail_sheet_shows_after_max_age(fake):
+    http, _ = fake
+    sheets.read_df("transactions")
+    tab = http.books["bench"]["transactions"]
+    tab["rows"][3][HEADERS["transactions"].index("fee")] = 12345.0
+    e = sheets._entry("transactions")
+    e.checked = 0.0  # the probe interval passed: a tail check, which sees nothing new
+    assert sheets.read_df("transactions")["fee"].iloc[2] != 12345.0
+    e.checked, e.full = 0.0, e.full - sheets.MAX_AGE
+    sheets.read_df("transactions")
+    _join_rereads()
+    assert sheets.read_df("transactions")["fee"].iloc[2] == 12345.0
+
+def test_own_write_does_not_hide_another_process_write(fake, journal, sheet_rows):
+    http, client = fake
+    spread = sheets.get_spreadsheet(client)
+    seen = len(sheets.read_df("daily_openings"))
+    # Another process appends a row and moves the token
+    spread.values_append("daily_openings!A1", params={"valueInputOption": "USER_ENTERED"},
+                         body={"values": [["2099-01-01", "other"]]})
+    spread.values_update(sheets._token_range("daily_openings"), params={"valueInputOption": "RAW"},
+                         body={"values": [["v_other"]]})
+    # Our own append lands right after, within the probe interval
+    sheets.append_row("daily_openings", {"date": "2099-01-02", "attendant": "me"})
+    sheets.flush_pending(spread, journal)
+    df = sheets.read_df("daily_openings")
+    assert len(df) == len(sheet_rows("daily_openings")) == seen + 2
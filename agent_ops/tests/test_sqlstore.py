@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+from lib import sqlstore
+from lib.sqlstore import SQLiteBackend
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteBackend(str(tmp_path / "store.db"))
+
+def _tx(rid: str, date: str, fee: float = 100.0) -> dict:
+    return {"id": rid, "date": date, "category": "charging", "fee": fee}
+
+def test_rows_read_back_typed_and_in_order(store):
+    store.append_row("transactions", _tx("tx_1", "2026-10-02"))
+    store.append_rows("transactions", [_tx("tx_2", "2026-10-01", 50), _tx("tx_3", "2026-10-02", 25.5)])
+    df = store.read_df("transactions")
+    assert list(df["id"]) == ["tx_1", "tx_2", "tx_3"]
+    assert list(df["fee"]) == [100.0, 50.0, 25.5]
+    assert list(store.read_df("transactions", "2026-10-02")["id"]) == ["tx_1", "tx_3"]
+    assert list(store.read_range("transactions", "2026-10-01", "2026-10-01")["id"]) == ["tx_2"]
+
+def test_upsert_updates_in_place_or_appends(store):
+    store.append_row("config_prices", {"key": "gas_price_per_kg", "value": "1400"})
+    store.upsert("config_prices", {"key": "gas_price_per_kg", "value": "1500"}, "key")
+    store.upsert("config_prices", {"key": "charging_price", "value": "200"}, "key")
+    df = store.read_df("config_prices")
+    assert df.values.tolist() == [["gas_price_per_kg", "1500"], ["charging_price", "200"]]
+
+def test_write_df_replaces_the_table(store):
+    store.append_row("config_prices", {"key": "old", "value": "1"})
+    store.write_df("config_prices", pd.DataFrame({"key": ["a", "b"], "value": ["2", "3"]}))
+    assert list(store.read_df("config_prices")["key"]) == ["a", "b"]
+
+def test_iter_range_pages_in_row_order(store, monkeypatch):
+    monkeypatch.setattr(sqlstore, "PAGE_ROWS", 2)
+    store.append_rows("transactions", [_tx(f"tx_{i}", f"2026-10-0{1 + i % 3}") for i in range(7)])
+    pages = list(store.iter_range("transactions", "2026-10-01", "2026-10-02"))
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [r for p in pages for r in p["id"]] == ["tx_0", "tx_1", "tx_3", "tx_4", "tx_6"]
+
+def test_upsert_rows_by_composite_key(store):
+    key = ("date", "category", "customer_method", "provider_method")
+    row = {"date": "2026-10-01", "category": "charging", "customer_method": "cash", "provider_method": "", "count": 3}
+    store.append_row("daily_summary", row)
+    store.upsert_rows("daily_summary", [dict(row, count=4), dict(row, category="gas_sale", count=1)], key)
+    df = store.read_df("daily_summary")
+    assert list(zip(df["category"], df["count"])) == [("charging", 4), ("gas_sale", 1)]
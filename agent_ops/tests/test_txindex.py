@@ -0,0 +1,52 @@
+import pytest
+from lib import sheets, txindex
+from lib.schema import HEADERS, partition_of
+from lib.utils import today_str
+
+def _first_id(http, title: str) -> str:
+    return http.books["bench"][title]["rows"][1][0]
+
+def test_reverse_negates_and_links_back(fake):
+    http, _ = fake
+    rid = _first_id(http, "transactions")
+    tx = txindex.transaction(rid)
+    row = txindex.reverse(rid, note="typo")
+    assert row["ref"] == rid and row["sub_type"] == txindex.REVERSAL and row["date"] == today_str()
+    assert row["cash_delta"] == -tx["cash_delta"] and row["fee"] == -tx["fee"]
+    assert txindex.reversal_of(rid) == row["id"]
+    assert txindex.find(rid) == [rid]  # the reversal is not listed under the original's ref
+
+def test_reverse_refuses_twice_and_reversals(fake):
+    http, _ = fake
+    rid = _first_id(http, "transactions")
+    row = txindex.reverse(rid)
+    with pytest.raises(ValueError, match="already reversed"):
+        txindex.reverse(rid)
+    with pytest.raises(ValueError, match="itself the reversal"):
+        txindex.reverse(row["id"])
+    with pytest.raises(ValueError, match="No transaction"):
+        txindex.reverse("tx_missing")
+
+def test_already_reversed_survives_a_restart(fake):
+    from bench.__main__ import reset_process
+    http, _ = fake
+    rid = _first_id(http, "transactions")
+    txindex.reverse(rid)
+    reset_process()  # the reversal is still only in the journal
+    with pytest.raises(ValueError, match="already reversed"):
+        txindex.reverse(rid)
+
+def test_foreign_row_does_not_reread_closed_months(monthly):
+    http, client = monthly
+    old = _first_id(http, sorted(t for t in http.books["bench"] if t.startswith("transactions_"))[0])
+    assert txindex.find(old) == [old]
+    # Another process appends a row to this month's worksheet
+    row = {"id": "tx_other", "date": today_str(), "category": "charging", "fee": 100.0}
+    title = partition_of("transactions", today_str())
+    sheets.get_spreadsheet(client).values_append(f"{title}!A1", params={"valueInputOption": "USER_ENTERED"},
+                                                 body={"values": [[row.get(h, "") for h in HEADERS["transactions"]]]})
+    sheets.clear_cache(title)
+    http.reset_counts()
+    assert txindex.find("tx_other") == ["tx_other"]
+    assert txindex.find(old) == [old]
+    assert "values_get" not in http.calls
@@ -2,54 +2,78 @@
 import streamlit as st, pandas as pd
 from lib.auth import ensure_logged_in, require_role, view_header
 from lib.sheets import read_df
-from lib.utils import today_str, naira
+from lib.utils import naira
+from lib.ledger import snapshot
+from lib.rollup import summary, daily_totals
+
+RANGES = {"Last 7 days": 7, "Last 30 days": 30, "Last 365 days": 365, "Custom": None}
 
 def render():
     ensure_logged_in()
     require_role(("admin",))
     view_header("Admin Dashboard")
 
-    tx = read_df("transactions"); op = read_df("daily_openings")
-    if tx.empty:
+    s = snapshot()
+    if s.count == 0:
         st.info("No transactions yet today.")
-        return
-
-    for col in ["amount_value","fee","cash_delta","pos_delta","transfer_delta","gas_kg","gas_kg_delta"]:
-        if col in tx.columns:
-            tx[col] = pd.to_numeric(tx[col], errors='coerce').fillna(0.0)
-
-    today = today_str()
-    today_tx = tx[tx["date"] == today]
-    cash0 = pos0 = tr0 = gas0 = 0.0
-    if not op.empty and any(op["date"]==today):
-        o = op[op["date"]==today].iloc[0]
-        cash0 = float(o.get("cash_open",0)); pos0 = float(o.get("pos_open",0))
-        tr0 = float(o.get("transfer_open",0)); gas0 = float(o.get("gas_open_kg",0))
-
-    cash = cash0 + today_tx["cash_delta"].sum()
-    pos  = pos0 + today_tx["pos_delta"].sum()
-    tr   = tr0 + today_tx["transfer_delta"].sum()
-    gas  = gas0 + today_tx["gas_kg_delta"].sum()
-
-    fees_total = today_tx["fee"].sum()
-    gas_revenue = today_tx.loc[today_tx["category"]=="gas_sale","amount_value"].sum()
-    count_tx = len(today_tx)
+    else:
+        _today(s)
+    st.divider()
+    _history(s.date)
 
+def _today(s):
     c1,c2,c3,c4 = st.columns(4)
-    c1.metric("Transactions today", f"{count_tx}")
-    c2.metric("Total fees today", naira(fees_total))
-    c3.metric("Gas sales ₦ today", naira(gas_revenue))
-    c4.metric("Gas in stock (kg, expected)", f"{gas:,.2f} kg")
+    c1.metric("Transactions today", f"{s.count}")
+    c2.metric("Total fees today", naira(s.fees))
+    c3.metric("Gas sales ₦ today", naira(s.gas_revenue))
+    c4.metric("Gas in stock (kg, expected)", f"{s.gas:,.2f} kg")
 
     c5,c6,c7 = st.columns(3)
-    c5.metric("Cash (expected)", naira(cash))
-    c6.metric("POS (expected)", naira(pos))
-    c7.metric("Transfer (expected)", naira(tr))
+    c5.metric("Cash (expected)", naira(s.cash))
+    c6.metric("POS (expected)", naira(s.pos))
+    c7.metric("Transfer (expected)", naira(s.transfer))
 
     st.subheader("Service Mix")
-    mix = today_tx.groupby("category")["id"].count().sort_values(ascending=False).reset_index().rename(columns={"id":"count"})
-    st.dataframe(mix, use_container_width=True, hide_index=True)
+    st.dataframe(s.service_mix(), use_container_width=True, hide_index=True)
 
     st.subheader("Today’s Transactions")
-    show = today_tx[["datetime","category","sub_type","customer_method","amount_value","fee","cash_delta","pos_delta","transfer_delta","gas_kg_delta","note","ref"]].copy()
-    st.dataframe(show, use_container_width=True, hide_index=True)
\ No newline at end of file
+    today_tx = read_df("transactions", date=s.date)
+    show = today_tx[["datetime","category","sub_type","customer_method","amount_value","fee","cash_delta","pos_delta","transfer_delta","gas_kg_delta","note","ref"]]
+    st.dataframe(show, use_container_width=True, hide_index=True)
+
+def _history(today: str):
+    # Reads only daily_summary rollups: one row per day x category x method
+    st.subheader("History")
+    end = pd.Timestamp(today)
+    pick = st.radio("Range", list(RANGES), horizontal=True)
+    if RANGES[pick] is None:
+        picked = st.date_input("From – to", value=(end - pd.Timedelta(days=29), end))
+        if len(picked) != 2:
+            st.caption("Pick an end date.")
+            return
+        start, end = (pd.Timestamp(d) for d in picked)
+    else:
+        start = end - pd.Timedelta(days=RANGES[pick] - 1)
+    start, end = start.date().isoformat(), end.date().isoformat()
+
+    days = daily_totals(start, end)
+    if days.empty:
+        st.info("No transactions in this range.")
+        return
+    c1,c2,c3 = st.columns(3)
+    c1.metric("Transactions", f"{int(days['count'].sum()):,}")
+    c2.metric("Fees", naira(days["fee"].sum()))
+    c3.metric("Gas sales ₦", naira(days["gas_revenue"].sum()))
+
+    days = days.set_index(pd.to_datetime(days["date"]))
+    st.caption("Fees and gas sales per day")
+    st.bar_chart(days[["fee", "gas_revenue"]])
+    st.caption("Expected closing balances (₦)")
+    st.line_chart(days[["cash", "pos", "transfer"]])
+    st.caption("Expected gas at close (kg)")
+    st.line_chart(days[["gas_kg"]])
+
+    mix = summary(start, end)
+    mix = mix.assign(category=mix["category"].astype(str)).groupby("category")[["count", "amount_value", "fee"]].sum()
+    st.caption("Service mix")
+    st.dataframe(mix.sort_values("count", ascending=False), use_container_width=True)
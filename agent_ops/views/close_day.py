@@ -0,0 +1,51 @@
+# views/close_day.py
+import streamlit as st, pandas as pd
+from lib.auth import ensure_logged_in, require_role, view_header
+from lib.closing import close_day, closing_for
+from lib.ledger import snapshot
+from lib.utils import today_str, naira
+
+def render():
+    ensure_logged_in()
+    require_role(("admin",))
+    view_header("Close Day")
+
+    day = str(st.date_input("Day to close", value=pd.to_datetime(today_str())).isoformat())
+    done = closing_for(day)
+    if done is not None:
+        st.success(f"{day} is closed.")
+        c1,c2,c3 = st.columns(3)
+        c1.metric("Cash counted", naira(done["cash_counted"]), f"{done['cash_variance']:+,.2f} vs expected")
+        c2.metric("Gas measured (kg)", f"{done['gas_measured_kg']:,.2f}", f"{done['gas_variance_kg']:+,.2f} kg")
+        c3.metric("Transactions", f"{done['tx_count']}", f"fees {naira(done['fees'])}", delta_color="off")
+        st.caption(f"Closed by {done['closed_by'] or '?'} at {done['closed_at']}. {done['notes']}")
+        return
+
+    s = snapshot(day)
+    if not s.has_opening:
+        st.warning("No opening balances for this day; expected values start from zero.")
+    elif s.opening_source != "opening":
+        st.caption(f"No opening entered for this day; balances carried from the {s.opening_source}.")
+    c1,c2,c3,c4 = st.columns(4)
+    c1.metric("Cash (expected)", naira(s.cash))
+    c2.metric("POS (expected)", naira(s.pos))
+    c3.metric("Transfer (expected)", naira(s.transfer))
+    c4.metric("Gas (kg, expected)", f"{s.gas:,.2f}")
+
+    cash = st.number_input("Cash counted (₦)", min_value=0.0, step=100.0, value=float(max(s.cash, 0.0)))
+    gas = st.number_input("Gas measured (kg)", min_value=0.0, step=0.5, format="%.2f", value=float(max(s.gas, 0.0)))
+    notes = st.text_area("Notes (explain any variance)")
+    c1,c2 = st.columns(2)
+    c1.metric("Cash variance", naira(cash - s.cash))
+    c2.metric("Gas variance (kg)", f"{gas - s.gas:+,.2f}")
+    st.caption("Closing freezes these totals and opens the next day with the counted cash and gas "
+               "and the expected POS and transfer balances.")
+
+    if st.button("Close Day"):
+        try:
+            close_day(day, cash, gas, notes, st.session_state.get("username", ""))
+        except ValueError as e:
+            st.error(str(e))
+            return
+        st.success(f"{day} closed. Next day's opening has been set.")
+        st.rerun()
@@ -1,14 +1,23 @@
 # views/corrections.py
-import streamlit as st
+import streamlit as st, pandas as pd
 from lib.auth import ensure_logged_in, require_role, view_header
 from lib.sheets import append_row
-from lib.utils import today_str, now_iso, new_id
+from lib.txindex import REVERSAL, find, transaction, reversal_of, reversal_row, reverse
+from lib.utils import today_str, now_iso, new_id, naira
+
+SHOW = ["id","datetime","category","sub_type","customer_method","amount_value","fee",
+        "cash_delta","pos_delta","transfer_delta","gas_kg_delta","note","ref"]
 
 def render():
     ensure_logged_in()
     require_role(("admin",))
     view_header("Corrections / Refunds")
 
+    st.subheader("Reverse a transaction")
+    _reverse()
+
+    st.divider()
+    st.subheader("Manual correction")
     st.caption("Enter exact opposite deltas to reverse a mistaken entry.")
     category = st.selectbox("Type", ["correction","refund"])
     note = st.text_area("Reason / reference id")
@@ -29,4 +38,41 @@ def render():
             "note": note, "ref": ""
         }
         append_row("transactions", row)
-        st.success("Saved.")
\ No newline at end of file
+        st.success("Saved.")
+
+def _reverse():
+    key = st.text_input("Transaction id or ref", key="rev_key").strip()
+    if not key:
+        return
+    ids = find(key)
+    if not ids:
+        st.warning("No transaction with that id or ref.")
+        return
+    rid = ids[0] if len(ids) == 1 else st.selectbox(f"{len(ids)} transactions match", ids, key="rev_pick")
+    tx = transaction(rid)
+    if tx is None:
+        st.warning("That transaction is not available right now; try again shortly.")
+        return
+    st.dataframe(pd.DataFrame([tx])[SHOW], use_container_width=True, hide_index=True)
+
+    if tx["sub_type"] == REVERSAL:
+        st.info(f"This is the reversal of {tx['ref']}.")
+        return
+    done = reversal_of(rid)
+    if done is not None:
+        st.info(f"Already reversed by {done}.")
+        return
+
+    category = st.selectbox("Type", ["correction","refund"], key="rev_type")
+    reason = st.text_input("Reason", key="rev_reason")
+    preview = reversal_row(tx)
+    st.caption(f"Posts today: cash {naira(preview['cash_delta'])}, POS {naira(preview['pos_delta'])}, "
+               f"transfer {naira(preview['transfer_delta'])}, gas {preview['gas_kg_delta']:+,.2f} kg, "
+               f"fee {naira(preview['fee'])}.")
+    if st.button("Reverse Transaction"):
+        try:
+            row = reverse(rid, category, reason, st.session_state.get("username", "admin"))
+        except ValueError as e:
+            st.error(str(e))
+            return
+        st.success(f"Reversed. Correction {row['id']} refers back to {rid}.")
@@ -0,0 +1,34 @@
+# views/export.py
+import streamlit as st, pandas as pd
+from lib.auth import ensure_logged_in, require_role, view_header
+from lib.export import FORMATS, export_transactions
+from lib.utils import today_str, shift_day
+
+def render():
+    ensure_logged_in()
+    require_role(("admin",))
+    view_header("Export Transactions")
+    _export()
+
+@st.fragment
+def _export():
+    today = pd.to_datetime(today_str())
+    c1,c2,c3 = st.columns(3)
+    start = c1.date_input("From", value=pd.to_datetime(shift_day(today_str(), -30)), max_value=today)
+    end = c2.date_input("To", value=today, max_value=today)
+    fmt = c3.radio("Format", list(FORMATS), horizontal=True)
+    if start > end:
+        st.warning("'From' is after 'To'.")
+        return
+    st.caption("Rows are read month by month and written straight to the file, so long ranges are fine.")
+    if not st.button("Prepare Export"):
+        return
+
+    note = st.empty()
+    with st.spinner("Reading transactions…"):
+        f, n = export_transactions(start.isoformat(), end.isoformat(), fmt,
+                                   progress=lambda rows: note.caption(f"{rows:,} rows written…"))
+    note.caption(f"{n:,} rows ready.")
+    ext, mime = FORMATS[fmt]
+    with f:
+        st.download_button(f"Download {fmt}", f.read(), f"transactions_{start}_{end}.{ext}", mime)
@@ -1,8 +1,10 @@
 # views/gas_inventory.py
-import streamlit as st, pandas as pd
+import streamlit as st
 from lib.auth import ensure_logged_in, require_role, view_header
-from lib.sheets import read_df, append_row
-from lib.utils import today_str, now_iso, naira, new_id, get_flag
+from lib.sheets import append_row
+from lib.ledger import snapshot
+from lib.config import config
+from lib.utils import today_str, now_iso, naira, new_id
 
 def render():
     ensure_logged_in()
@@ -10,22 +12,12 @@ def render():
     view_header("Gas Inventory")
 
     # Show current expected stock (from today’s openings + transactions)
-    tx = read_df("transactions")
-    op = read_df("daily_openings")
-    t = today_str()
-    gas = 0.0
-    if not op.empty and any(op["date"]==t):
-        gas = float(op[op["date"]==t]["gas_open_kg"].iloc[0])
-    if not tx.empty:
-        d = tx[tx["date"]==t].copy()
-        if "gas_kg_delta" in d.columns:
-            d["gas_kg_delta"] = pd.to_numeric(d["gas_kg_delta"], errors='coerce').fillna(0.0)
-            gas += d["gas_kg_delta"].sum()
+    gas = snapshot().gas
 
     st.metric("Gas in stock (expected, kg)", f"{gas:,.2f}")
 
     # Admin can record stock-in; attendant only if allowed via flag
-    allow_attendant_stockin = get_flag("allow_attendant_stock_in_today", False)
+    allow_attendant_stockin = config().flag("allow_attendant_stock_in_today", False)
     can_stock_in = (st.session_state["role"] == "admin") or (allow_attendant_stockin and st.session_state["role"]=="attendant")
 
     if not can_stock_in:
@@ -2,6 +2,7 @@
 import streamlit as st, pandas as pd
 from lib.auth import ensure_logged_in, require_role, view_header
 from lib.sheets import read_df, append_row, write_df
+from lib.metrics import instrument
 from lib.utils import today_str
 
 def render():
@@ -21,26 +22,42 @@ def render():
             st.dataframe(existing, use_container_width=True, hide_index=True)
         return
 
-    # Admin flow (can set or edit)
+    # Admin flow (can set or edit); each part reruns on its own
+    msg = st.session_state.pop("saved_open_day", None)
+    if msg:
+        st.success(msg)
     if existing.empty:
-        st.info("Set today's opening balances.")
-        att = st.text_input("Attendant name (optional)", value="attendant")
-        c = st.number_input("Opening Cash (₦)", min_value=0.0, step=1000.0)
-        p = st.number_input("Opening POS (₦)", min_value=0.0, step=1000.0)
-        t = st.number_input("Opening Transfer (₦)", min_value=0.0, step=1000.0)
-        g = st.number_input("Opening Gas (kg)", min_value=0.0, step=0.5, format="%.2f")
-        notes = st.text_area("Notes")
-        if st.button("Save Opening"):
-            row = {"date": today, "attendant": att, "cash_open": c, "pos_open": p, "transfer_open": t, "gas_open_kg": g, "notes": notes}
-            append_row("daily_openings", row)
-            st.success("Opening saved.")
+        _set_opening(today)
     else:
-        st.success("Today's opening already set.")
-        st.dataframe(existing, use_container_width=True, hide_index=True)
-        st.caption("Edit values below and click Update.")
-        edited = st.data_editor(existing.reset_index(drop=True), use_container_width=True, key="open_editor")
-        if st.button("Update Opening"):
-            opens2 = opens[opens["date"] != today]
-            out = pd.concat([opens2, edited], ignore_index=True)
-            write_df("daily_openings", out)
-            st.success("Updated.")
\ No newline at end of file
+        _edit_opening(today)
+
+@st.fragment
+@instrument("fragment", "open_day.set")
+def _set_opening(today: str):
+    st.info("Set today's opening balances.")
+    att = st.text_input("Attendant name (optional)", value="attendant")
+    c = st.number_input("Opening Cash (₦)", min_value=0.0, step=1000.0)
+    p = st.number_input("Opening POS (₦)", min_value=0.0, step=1000.0)
+    t = st.number_input("Opening Transfer (₦)", min_value=0.0, step=1000.0)
+    g = st.number_input("Opening Gas (kg)", min_value=0.0, step=0.5, format="%.2f")
+    notes = st.text_area("Notes")
+    if st.button("Save Opening"):
+        row = {"date": today, "attendant": att, "cash_open": c, "pos_open": p, "transfer_open": t, "gas_open_kg": g, "notes": notes}
+        append_row("daily_openings", row)
+        st.session_state["saved_open_day"] = "Opening saved."
+        st.rerun()  # whole page: it switches to the edit view
+
+@st.fragment
+@instrument("fragment", "open_day.edit")
+def _edit_opening(today: str):
+    opens = read_df("daily_openings")
+    existing = opens[opens["date"] == today]
+    st.success("Today's opening already set.")
+    st.dataframe(existing, use_container_width=True, hide_index=True)
+    st.caption("Edit values below and click Update.")
+    edited = st.data_editor(existing.reset_index(drop=True), use_container_width=True, key="open_editor")
+    if st.button("Update Opening"):
+        opens2 = opens[opens["date"] != today]
+        out = pd.concat([opens2, edited], ignore_index=True)
+        write_df("daily_openings", out)
+        st.success("Updated.")
@@ -0,0 +1,43 @@
+# views/performance.py
+import time
+import streamlit as st
+from lib.auth import ensure_logged_in, require_role, view_header
+from lib.metrics import get_metrics, summary
+
+def render():
+    ensure_logged_in()
+    require_role(("admin",))
+    view_header("Performance")
+
+    m = get_metrics()
+    events = m.frame()
+    st.caption(f"Last {len(events):,} events in this process "
+               f"(since {time.strftime('%Y-%m-%d %H:%M', time.localtime(m.started))}).")
+    if events.empty:
+        st.info("Nothing recorded yet.")
+        return
+
+    table = summary(events)
+    sheets = table[table["kind"] == "sheets"]
+    reads = table[table["kind"] == "read_df"]
+    c1,c2,c3,c4 = st.columns(4)
+    c1.metric("Sheets API calls", f"{int(sheets['count'].sum()):,}")
+    c2.metric("Retries (429s)", f"{int(sheets['retries'].sum())} ({int(sheets['throttled'].sum())})")
+    c3.metric("KB transferred", f"{sheets['bytes'].sum() / 1024:,.1f}")
+    hits, misses = int(reads["hits"].sum()), int(reads["misses"].sum())
+    c4.metric("read_df hit rate", f"{hits / (hits + misses):.0%}" if hits + misses else "—")
+
+    kind = st.selectbox("Show", ["all"] + sorted(table["kind"].unique()))
+    shown = table if kind == "all" else table[table["kind"] == kind]
+    st.dataframe(shown.round(1), use_container_width=True, hide_index=True)
+
+    with st.expander("Recent events"):
+        st.dataframe(events.tail(200).iloc[::-1], use_container_width=True, hide_index=True)
+
+    c1,c2,c3 = st.columns(3)
+    c1.download_button("Summary CSV", table.to_csv(index=False), "perf_summary.csv", "text/csv")
+    c2.download_button("Events JSON", events.to_json(orient="records", date_format="iso"),
+                       "perf_events.json", "application/json")
+    if c3.button("Clear"):
+        m.clear()
+        st.rerun()
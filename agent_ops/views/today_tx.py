@@ -9,24 +9,16 @@ def render():
     require_role(("admin","attendant"))
     view_header("Today’s Transactions")
 
-    tx = read_df("transactions")
-    if tx.empty:
-        st.info("No transactions yet.")
-        return
-
-    df = tx.copy()
     # Attendant is locked to today
     if st.session_state["role"] == "attendant":
-        df = df[df["date"] == today_str()]
+        df = read_df("transactions", date=today_str())
         st.caption("Showing today only (attendant scope).")
     else:
         # admin can filter (basic date filter)
         pick = st.date_input("Filter by date", value=pd.to_datetime(today_str()))
-        df = df[df["date"] == str(pick)]
-
-    # Prevent Arrow overflow if id/ref were numeric-looking
-    for col in ["id","ref"]:
-        if col in df.columns:
-            df[col] = df[col].astype(str)
+        df = read_df("transactions", date=str(pick))
+    if df.empty:
+        st.info("No transactions for this date.")
+        return
 
     st.dataframe(df, use_container_width=True, hide_index=True)
\ No newline at end of file